@@ -12,5 +12,53 @@ load_dotenv(ENV_FILE)
 class Settings:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
+    # Optional read replica for read-only routes; reads fall back to the primary when it lags or is down
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+    # Connection pool: DB_CONNECTION_BUDGET is split across WEB_CONCURRENCY workers unless sized explicitly,
+    # then between each worker's sync and async engines (DB_ASYNC_POOL_SHARE goes to the async one)
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+    DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", "20"))
+    DB_ASYNC_POOL_SHARE = float(os.getenv("DB_ASYNC_POOL_SHARE", "0.5"))
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE")) if os.getenv("DB_POOL_SIZE") else None
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW")) if os.getenv("DB_MAX_OVERFLOW") else None
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Commit on success / roll back on error around each request's session (routes that commit themselves are unaffected)
+    DB_TRANSACTION_PER_REQUEST = os.getenv("DB_TRANSACTION_PER_REQUEST", "false").lower() == "true"
+    # SQLite (dev / single-node): applied to every connection
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", "268435456"))
+    METRICS_RECONCILE_INTERVAL = int(os.getenv("METRICS_RECONCILE_INTERVAL", "300"))
+    METRICS_REQUEST_TIMEOUT = float(os.getenv("METRICS_REQUEST_TIMEOUT", "10"))
+    RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", "32"))
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+    RESPONSE_COMPRESSION_ENABLED = os.getenv("RESPONSE_COMPRESSION_ENABLED", "true").lower() == "true"
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+    SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "true").lower() == "true"
+    # Required for /metrics outside development/test
+    METRICS_SCRAPE_TOKEN = os.getenv("METRICS_SCRAPE_TOKEN", "")
+    SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "1000"))
+    SLOW_REQUEST_BUFFER_SIZE = int(os.getenv("SLOW_REQUEST_BUFFER_SIZE", "200"))
+    ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    # warn (dev/test default), raise (fail the offending query; for test runs) or off
+    SQL_N_PLUS_ONE_MODE = os.getenv(
+        "SQL_N_PLUS_ONE_MODE", "warn" if ENVIRONMENT in ("development", "test") else "off"
+    )
+    # Record where each leaked session was opened (a short stack per transaction; dev/test default)
+    DB_SESSION_LEAK_STACKS = os.getenv(
+        "DB_SESSION_LEAK_STACKS", "true" if ENVIRONMENT in ("development", "test") else "false"
+    ).lower() == "true"
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "10"))
+    LOG_SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW", "60"))
 
 settings = Settings()
@@ -0,0 +1,41 @@
+"""
+Async database access for async routes: asyncpg on Postgres, aiosqlite for local SQLite
+"""
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from config import settings
+from database.connection import SQLALCHEMY_DATABASE_URL, InstrumentedAsyncQueuePool, configure_sqlite, pool_settings
+
+
+def async_database_url(url: str) -> str:
+    """Swap the sync driver in DATABASE_URL for its async counterpart"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    return url
+
+
+def build_async_engine(url: str):
+    """Async engine for a sync DATABASE_URL-style `url`"""
+    url = async_database_url(url)
+    if url.startswith("sqlite"):
+        sqlite_engine = create_async_engine(url)
+        configure_sqlite(sqlite_engine.sync_engine)
+        return sqlite_engine
+    # DB_ASYNC_POOL_SHARE of the worker's budget, so both pools together stay within it;
+    # the async engine needs the asyncio-aware pool class
+    options = pool_settings(settings.DB_ASYNC_POOL_SHARE)
+    options["poolclass"] = InstrumentedAsyncQueuePool
+    return create_async_engine(url, **options)
+
+
+async_engine = build_async_engine(SQLALCHEMY_DATABASE_URL)
+
+# expire_on_commit=False: attributes stay readable after commit without an implicit (sync) refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,25 +1,149 @@
-from sqlalchemy import create_engine
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from config import settings
+from utils.metrics_registry import db_pool_checkout_wait_seconds
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-# Only use check_same_thread=False for SQLite
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+class _CheckoutWaitTimer:
+    """Pool mixin recording how long each checkout waited for a connection, labelled by metrics_engine"""
+
+    metrics_engine = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait_seconds.observe(time.perf_counter() - started, self.metrics_engine)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_engine = self.metrics_engine
+        return pool
+
+
+class InstrumentedQueuePool(_CheckoutWaitTimer, QueuePool):
+    """QueuePool with checkout wait timing"""
+
+
+class InstrumentedAsyncQueuePool(_CheckoutWaitTimer, AsyncAdaptedQueuePool):
+    """The async engines' pool with checkout wait timing"""
+
+
+def pool_settings(share: float = 1.0) -> dict:
+    """
+    Pool sizing for one engine: the deployment's connection budget is split
+    across WEB_CONCURRENCY workers, each engine of a worker gets `share` of
+    that, half kept open and half as overflow, unless DB_POOL_SIZE /
+    DB_MAX_OVERFLOW are set explicitly.
+    """
+    per_worker = max(2, settings.DB_CONNECTION_BUDGET // max(1, settings.WEB_CONCURRENCY))
+    per_engine = max(1, int(per_worker * share))
+    pool_size = settings.DB_POOL_SIZE if settings.DB_POOL_SIZE is not None else max(1, per_engine // 2)
+    max_overflow = settings.DB_MAX_OVERFLOW if settings.DB_MAX_OVERFLOW is not None else max(0, per_engine - pool_size)
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": True,
+    }
+
+
+def sqlite_pragmas() -> list:
+    """
+    Per-connection SQLite settings for single-node deployments: WAL lets
+    readers run alongside the one writer, synchronous=NORMAL only fsyncs at
+    checkpoints (still durable against application crashes), and the busy
+    timeout makes writers queue instead of failing with 'database is locked'.
+    busy_timeout goes first so switching the journal mode can wait too.
+    """
+    return [
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT_MS),
+        ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+        ("synchronous", settings.SQLITE_SYNCHRONOUS),
+        ("cache_size", settings.SQLITE_CACHE_SIZE),
+        ("mmap_size", settings.SQLITE_MMAP_SIZE),
+        ("temp_store", "MEMORY"),
+    ]
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: list):
+    """Run PRAGMA statements on a raw DB-API connection (sqlite3 or the aiosqlite adapter)"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def configure_sqlite(engine):
+    """Apply sqlite_pragmas() to every new connection of `engine`"""
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+
+def build_engine(url: str):
+    """Engine for `url`: tuned pragmas on SQLite, the sized and instrumented pool elsewhere"""
+    # Only use check_same_thread=False for SQLite
+    if url.startswith("sqlite"):
+        sqlite_engine = create_engine(url, connect_args={"check_same_thread": False})
+        configure_sqlite(sqlite_engine)
+        return sqlite_engine
+    # The async engine (database.async_connection) takes the rest of the worker's budget
+    return create_engine(url, **pool_settings(1 - settings.DB_ASYNC_POOL_SHARE))
+
+
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+@contextmanager
+def session_scope(commit: bool = False, factory=None):
+    """
+    A session (from `factory`, SessionLocal by default) that is always
+    closed: rolled back if the block raises, committed on success when
+    `commit` is set
+    """
+    db = (factory or SessionLocal)()
     try:
         yield db
+        if commit:
+            db.commit()
+    except BaseException:
+        db.rollback()
+        raise
     finally:
         db.close()
+
+def get_db():
+    """Request-scoped session dependency; one transaction per request when DB_TRANSACTION_PER_REQUEST is set"""
+    with session_scope(commit=settings.DB_TRANSACTION_PER_REQUEST) as db:
+        yield db
+
+def warm_pool() -> int:
+    """Open the pool's minimum connections up front; returns how many were opened"""
+    size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 0
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
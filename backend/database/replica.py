@@ -0,0 +1,160 @@
+"""
+Read-replica routing: read-only queries go to DATABASE_REPLICA_URL, writes and everything after a write go to the primary
+
+To try it locally, point the URLs at two Postgres containers, or at two SQLite files
+(copy sql_app.db to sql_app_replica.db first; reads then visibly come from the copy):
+DATABASE_URL=sqlite:///./sql_app.db DATABASE_REPLICA_URL=sqlite:///./sql_app_replica.db
+"""
+import asyncio
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from config import settings
+from database.connection import build_engine, engine, session_scope
+from database.async_connection import build_async_engine, async_engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds the standby is behind; 0 when it has replayed everything it received
+# (a server that isn't a standby returns NULL, which counts as no lag)
+POSTGRES_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaMonitor:
+    """
+    Tracks whether the replica may serve reads: reachable and no more than
+    `max_lag_seconds` behind. Starts unusable until the first check, so a
+    worker never reads from a replica it hasn't seen.
+    """
+
+    def __init__(self, replica_engine, max_lag_seconds: float):
+        self.engine = replica_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[str] = None
+
+    @property
+    def usable(self) -> bool:
+        return self.engine is not None and self.healthy
+
+    def check(self):
+        """Measure replication lag (blocking)"""
+        if self.engine is None:
+            return
+        was_healthy = self.healthy
+        try:
+            with self.engine.connect() as connection:
+                if self.engine.dialect.name == "postgresql":
+                    lag = connection.execute(POSTGRES_LAG_SQL).scalar()
+                else:
+                    # No replication to measure (e.g. two SQLite files)
+                    connection.execute(text("SELECT 1"))
+                    lag = 0
+            self.lag_seconds = float(lag or 0)
+            self.last_error = None
+            self.healthy = self.lag_seconds <= self.max_lag_seconds
+        except Exception as e:
+            self.lag_seconds = None
+            self.last_error = str(e)[:200]
+            self.healthy = False
+        self.checked_at = datetime.now().isoformat()
+        if self.healthy != was_healthy:
+            if self.healthy:
+                logger.info("Replica reads enabled (lag %.1fs)", self.lag_seconds)
+            else:
+                logger.warning("Replica reads disabled, falling back to primary (lag %s, error %s)",
+                               self.lag_seconds, self.last_error)
+
+    async def run(self, interval: float):
+        """Re-check the replica every `interval` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.check)
+            except Exception as e:
+                logger.error("Replica check failed: %s", e)
+
+    def snapshot(self) -> Dict:
+        return {
+            "configured": self.engine is not None,
+            "usable": self.usable,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "last_error": self.last_error,
+            "checked_at": self.checked_at,
+        }
+
+
+replica_engine = build_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+async_replica_engine = build_async_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+replica_monitor = ReplicaMonitor(replica_engine, settings.REPLICA_MAX_LAG_SECONDS)
+
+
+class RoutingSession(Session):
+    """
+    Sends plain SELECTs to the replica while it is usable. Any write (flush,
+    INSERT/UPDATE/DELETE, text() or SELECT ... FOR UPDATE) goes to the
+    primary and pins the session there, so a request reads its own writes.
+    """
+
+    primary_bind = engine
+    replica_bind = replica_engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("pinned_to_primary") or self.info.get("reading_from_primary"):
+            return self.primary_bind
+        is_read = isinstance(clause, Select) and clause._for_update_arg is None
+        if self._flushing or not is_read:
+            self.info["pinned_to_primary"] = True
+            return self.primary_bind
+        if self.replica_bind is not None and replica_monitor.usable:
+            return self.replica_bind
+        return self.primary_bind
+
+
+class AsyncRoutingSession(RoutingSession):
+    """RoutingSession behind an AsyncSession (binds are the async engines' sync facades)"""
+
+    primary_bind = async_engine.sync_engine
+    replica_bind = async_replica_engine.sync_engine if async_replica_engine is not None else None
+
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+AsyncReadSessionLocal = async_sessionmaker(sync_session_class=AsyncRoutingSession, expire_on_commit=False, autoflush=False)
+
+
+@contextmanager
+def reading_from_primary(db: Session):
+    """
+    Send this block's reads to the primary without pinning the session: for
+    rows an earlier request may have just written (a conversation's previous
+    turn) that the replica might not have replayed yet
+    """
+    previous = db.info.get("reading_from_primary", False)
+    db.info["reading_from_primary"] = True
+    try:
+        yield db
+    finally:
+        db.info["reading_from_primary"] = previous
+
+
+def get_read_db():
+    """Session dependency for read-mostly routes: replica reads, primary after the first write"""
+    with session_scope(commit=settings.DB_TRANSACTION_PER_REQUEST, factory=ReadSessionLocal) as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
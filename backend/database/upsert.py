@@ -0,0 +1,58 @@
+"""
+Bulk upserts: INSERT ... ON CONFLICT DO UPDATE for many rows in one statement (PostgreSQL and SQLite)
+"""
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import JSON, Text, cast, or_
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, model):
+    """insert() with ON CONFLICT support for the session's database"""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Bulk upsert is not supported on {name}")
+    return insert(model)
+
+
+def _differs(column, new_value):
+    # json has no equality operator on Postgres; compare the serialized text instead
+    if isinstance(column.type, JSON):
+        return cast(column, Text).is_distinct_from(cast(new_value, Text))
+    return column.is_distinct_from(new_value)
+
+
+def bulk_upsert(
+    db: Session,
+    model,
+    rows: List[Dict],
+    conflict_columns: Sequence[str],
+    compare_columns: Sequence[str] = (),
+    returning: Sequence[str] = (),
+) -> Optional[list]:
+    """
+    Insert `rows` (dicts with identical keys) in one statement; a row that
+    collides on `conflict_columns` (which need a unique index) takes the new
+    values instead. With `compare_columns`, an existing row is only rewritten
+    when one of them differs, so `returning` yields exactly the rows that
+    were inserted or changed.
+    """
+    if not rows:
+        return [] if returning else None
+
+    table = model.__table__
+    statement = dialect_insert(db, model).values(rows)
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={name: excluded[name] for name in rows[0] if name not in conflict_columns},
+        where=or_(*[_differs(table.c[name], excluded[name]) for name in compare_columns]) if compare_columns else None,
+    )
+    if returning:
+        return db.execute(statement.returning(*[table.c[name] for name in returning])).all()
+    db.execute(statement)
+    return None
@@ -3,28 +3,231 @@ Synops Labs Dashboard - Main FastAPI Application
 Fixed to match frontend expectations exactly
 Cache cleared: 2025-11-24 23:02
 """
-from fastapi import FastAPI, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, HTTPException, Query, status, WebSocket, WebSocketDisconnect, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import os
 import json
+import logging
+import time
+import asyncio
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from config import settings
+from database.connection import get_db, engine, Base, SessionLocal, warm_pool
+from database.async_connection import async_engine
+from database.replica import (
+    get_async_read_db, get_read_db, reading_from_primary, replica_monitor, replica_engine,
+    async_replica_engine, ReadSessionLocal
+)
 from services.sheets import sheets_service
+from services.incremental_metrics import incremental_metrics
+from services.mrr_waterfall import mrr_waterfall_engine
+from services.cohort_engine import cohort_engine
+from services.segment_ltv import segment_ltv_job
+from services.cac_attribution import cac_attribution_engine
+from services.metric_stream import metric_stream_broker
+from services.metric_dependencies import metrics_graph, DependencyTimeout
+from utils.http_cache import make_etag, etag_matches, permission_fingerprint, conditional_get_stats
+from utils.response_cache import ResponseCache, ResponseCacheMiddleware
+from utils.fast_json import FastJSONResponse
+from utils.logging_config import configure_logging
+from utils.profiler import profiler, ProfilerBusy
+from utils.compression import CompressionMiddleware
+from utils.timing import TimingMiddleware, route_timings, annotate
+from utils.sql_stats import instrument_engine, NPlusOneDetector
+from utils.slow_requests import SlowRequestLog
+from utils.session_leaks import SessionLeakDetector
+from utils.metrics_registry import metrics_registry, observe_request, instrument_pool, CONTENT_TYPE as METRICS_CONTENT_TYPE
 from services.calculations import (
-    calculate_mrr, calculate_cac, calculate_ltv, calculate_qvc, calculate_ltgp,
-    calculate_nrr, calculate_gross_margin, calculate_customer_concentration
+    calculate_mrr, calculate_ltv, calculate_qvc, calculate_ltgp
 )
 
 load_dotenv()
 
+configure_logging(
+    level=settings.LOG_LEVEL,
+    module_levels=settings.LOG_LEVELS,
+    fmt=settings.LOG_FORMAT,
+    sample_burst=settings.LOG_SAMPLE_BURST,
+    sample_window=settings.LOG_SAMPLE_WINDOW
+)
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# STARTUP / SHUTDOWN
+# ============================================
+
+def create_tables():
+    """Create any missing tables once per worker"""
+    import models.user, models.permission, models.business_metric, models.alfred_session, models.api_key  # noqa: F401 - register every table on Base
+    Base.metadata.create_all(bind=engine)
+
+
+def check_metric_indexes():
+    """Metric upserts conflict on a unique index that create_all doesn't add to an existing business_metrics table"""
+    from models.business_metric import BusinessMetric
+
+    existing = {index["name"] for index in inspect(engine).get_indexes(BusinessMetric.__tablename__)}
+    missing = [index.name for index in BusinessMetric.__table__.indexes if index.name not in existing]
+    if missing:
+        raise RuntimeError(
+            f"business_metrics is missing {', '.join(missing)}; run python scripts/migrate_metric_indexes.py"
+        )
+
+
+def build_alfred_client():
+    from services.alfred_service import get_alfred_service
+    get_alfred_service()
+
+
+async def prewarm_sheets():
+    """Build the Sheets client and fill the tab cache (reconcile also primes the incremental totals)"""
+    await asyncio.to_thread(sheets_service.initialize)
+    await asyncio.gather(incremental_metrics.reconcile(), sheets_service.get_monthly_snapshots())
+
+
+def prewarm_permission_tables():
+    """Touch the permission tables so their pages and compiled queries are hot"""
+    from database.connection import SessionLocal
+    from services.permission_service import PermissionService
+
+    db = SessionLocal()
+    try:
+        service = PermissionService(db)
+        service.get_all_features()
+        service.get_all_role_department_templates()
+    finally:
+        db.close()
+    for user in MOCK_USERS.values():
+        permission_fingerprint(user)
+
+
+async def run_warmup() -> Dict[str, Any]:
+    """
+    Run every warm-up step in order and time it. A failing step is recorded
+    rather than raised, so the worker still starts and that step falls back
+    to its lazy path on first use.
+    """
+    steps = [
+        ("database", lambda: asyncio.to_thread(create_tables)),
+        ("metric_indexes", lambda: asyncio.to_thread(check_metric_indexes)),
+        ("db_pool", lambda: asyncio.to_thread(warm_pool)),
+        ("replica", lambda: asyncio.to_thread(replica_monitor.check)),
+        ("alfred", lambda: asyncio.to_thread(build_alfred_client)),
+        ("sheets", prewarm_sheets),
+        ("permissions", lambda: asyncio.to_thread(prewarm_permission_tables)),
+    ]
+    warmup = {"steps": {}, "started_at": datetime.now().isoformat()}
+    started = time.perf_counter()
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            await step()
+            result = {"status": "ok"}
+        except Exception as e:
+            logger.error("Warm-up step %s failed: %s", name, e)
+            result = {"status": "error", "error": str(e)[:200]}
+        result["ms"] = round((time.perf_counter() - step_started) * 1000, 1)
+        warmup["steps"][name] = result
+    warmup["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    warmup["ready"] = all(step["status"] == "ok" for step in warmup["steps"].values())
+    return warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize clients and caches before the worker accepts requests"""
+    app.state.warmup = await run_warmup()
+    logger.info("Warm-up finished", extra={"warmup": app.state.warmup})
+
+    # Reconcile already ran during warm-up; the next pass is one interval away
+    reconcile_task = asyncio.create_task(
+        incremental_metrics.run_reconciliation_loop(
+            settings.METRICS_RECONCILE_INTERVAL,
+            initial_delay=settings.METRICS_RECONCILE_INTERVAL if incremental_metrics.is_primed else 0
+        )
+    )
+    app.state.reconcile_task = reconcile_task
+    replica_task = asyncio.create_task(replica_monitor.run(settings.REPLICA_CHECK_INTERVAL)) if replica_engine else None
+    yield
+    reconcile_task.cancel()
+    if replica_task:
+        replica_task.cancel()
+    await async_engine.dispose()
+    if async_replica_engine:
+        await async_replica_engine.dispose()
+
+
 app = FastAPI(
     title="Synops Labs API",
     description="Backend API for Synops Labs Dashboard",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
+)
+
+response_cache = ResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL
+)
+
+def caller_permission_fingerprint(authorization: Optional[str]) -> str:
+    """Permission-set hash for a bearer token (unknown callers share one)"""
+    token = authorization[7:] if authorization and authorization[:7].lower() == "bearer " else ""
+    user = MOCK_USERS.get(token.replace("mock_access_token_", "")) or {}
+    return permission_fingerprint(user)
+
+# Shared response cache (inside CORS so cached bodies never carry CORS headers)
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache, fingerprint=caller_permission_fingerprint)
+sheets_service.add_refresh_listener(response_cache.invalidate)
+incremental_metrics.add_listener(lambda: response_cache.invalidate("incremental"))
+
+# Live metric stream recomputes once per upstream change
+sheets_service.add_refresh_listener(metric_stream_broker.notify_change)
+incremental_metrics.add_listener(metric_stream_broker.notify_change)
+
+# Compress large bodies outside the response cache, which keeps identity-encoded copies
+if settings.RESPONSE_COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES)
+
+# Per-stage request timing (outside compression, so the total covers it)
+slow_request_log = SlowRequestLog(
+    threshold_ms=settings.SLOW_REQUEST_THRESHOLD_MS,
+    capacity=settings.SLOW_REQUEST_BUFFER_SIZE
 )
+n_plus_one_detector = NPlusOneDetector(
+    threshold=settings.SQL_N_PLUS_ONE_THRESHOLD,
+    mode=settings.SQL_N_PLUS_ONE_MODE
+)
+session_leak_detector = SessionLeakDetector(capture_stack=settings.DB_SESSION_LEAK_STACKS)
+session_leak_detector.track(SessionLocal)
+session_leak_detector.track(ReadSessionLocal)
+app.add_middleware(
+    TimingMiddleware,
+    timings=route_timings,
+    emit_header=settings.SERVER_TIMING_HEADER,
+    observer=observe_request,
+    inspectors=[slow_request_log, n_plus_one_detector, session_leak_detector]
+)
+instrument_engine(engine, n_plus_one_detector)
+instrument_engine(async_engine.sync_engine, n_plus_one_detector)
+if replica_engine:
+    instrument_engine(replica_engine, n_plus_one_detector)
+    instrument_engine(async_replica_engine.sync_engine, n_plus_one_detector)
+instrument_pool(engine, "primary")
+instrument_pool(async_engine.sync_engine, "primary_async")
+if replica_engine:
+    instrument_pool(replica_engine, "replica")
+    instrument_pool(async_replica_engine.sync_engine, "replica_async")
 
 # CORS
 app.add_middleware(
@@ -37,6 +240,7 @@ app.add_middleware(
 
 security = HTTPBearer(auto_error=False)
 
+
 # ============================================
 # MODELS
 # ============================================
@@ -283,6 +487,8 @@ MOCK_CONVERSATIONS = [
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[int, WebSocket] = {}
+        # Sends started but not yet flushed, per user (the send-queue depth)
+        self.pending_sends: Dict[int, int] = {}
     
     async def connect(self, user_id: int, websocket: WebSocket):
         await websocket.accept()
@@ -291,11 +497,20 @@ class ConnectionManager:
     def disconnect(self, user_id: int):
         if user_id in self.active_connections:
             del self.active_connections[user_id]
+        self.pending_sends.pop(user_id, None)
+    
+    async def _send(self, user_id: int, connection: WebSocket, message: dict):
+        self.pending_sends[user_id] = self.pending_sends.get(user_id, 0) + 1
+        try:
+            await connection.send_json(message)
+        finally:
+            if user_id in self.pending_sends:
+                self.pending_sends[user_id] -= 1
     
     async def send_message(self, user_id: int, message: dict):
         if user_id in self.active_connections:
             try:
-                await self.active_connections[user_id].send_json(message)
+                await self._send(user_id, self.active_connections[user_id], message)
             except:
                 self.disconnect(user_id)
     
@@ -303,12 +518,39 @@ class ConnectionManager:
         for user_id, connection in list(self.active_connections.items()):
             if user_id != exclude_user:
                 try:
-                    await connection.send_json(message)
+                    await self._send(user_id, connection, message)
                 except:
                     self.disconnect(user_id)
 
 manager = ConnectionManager()
 
+# Scrape-time gauges for connection state and cache freshness
+metrics_registry.gauge("websocket_connections", "Open chat WebSocket connections", lambda: len(manager.active_connections))
+# Totals only: a user_id label would add a series per user
+metrics_registry.gauge(
+    "websocket_send_queue_depth", "Chat WebSocket sends in flight, summed over users",
+    lambda: sum(list(manager.pending_sends.values()))
+)
+metrics_registry.gauge(
+    "websocket_send_queue_depth_max", "Most chat WebSocket sends in flight for a single user",
+    lambda: max(list(manager.pending_sends.values()), default=0)
+)
+metrics_registry.gauge("sse_subscribers", "Open metric stream connections", lambda: len(metric_stream_broker.subscribers))
+metrics_registry.gauge(
+    "sse_pending_metrics", "Changed metrics waiting to be sent, summed over stream connections",
+    lambda: sum(len(subscriber.pending) for subscriber in list(metric_stream_broker.subscribers))
+)
+metrics_registry.gauge(
+    "sheets_cache_age_seconds", "Seconds since each cached Sheets tab was read",
+    lambda: {(tab,): age for tab, age in sheets_service.cache_ages().items()}, ("tab",)
+)
+metrics_registry.gauge("db_sessions_open", "Sessions currently holding a database connection", session_leak_detector.open_count)
+metrics_registry.gauge("db_replica_usable", "1 while read-only queries are routed to the replica", lambda: int(replica_monitor.usable))
+metrics_registry.gauge(
+    "db_replica_lag_seconds", "Replication lag at the last check (-1 when unknown)",
+    lambda: replica_monitor.lag_seconds if replica_monitor.lag_seconds is not None else -1
+)
+
 # Audit logs storage
 AUDIT_LOGS = []
 
@@ -322,6 +564,70 @@ SYSTEM_CONFIG = {
     "password_require_number": True,
 }
 
+# Version counters for the in-memory admin data, bumped on every mutation
+ADMIN_DATA_VERSIONS = {"users": 0, "logs": 0, "config": 0}
+
+def bump_admin_version(source: str) -> None:
+    """Mark in-memory admin data as changed and drop cached responses built from it"""
+    ADMIN_DATA_VERSIONS[source] += 1
+    response_cache.invalidate(source)
+
+
+# ============================================
+# CONDITIONAL GET (ETAGS)
+# ============================================
+
+SHEET_TABS = {"customers", "expenses", "projects", "snapshots"}
+
+async def content_version(sources) -> List:
+    """Current version of each data source a response is built from"""
+    # Cold tabs are read concurrently, not one after another
+    tabs = [source for source in sources if source in SHEET_TABS]
+    tab_versions = dict(zip(tabs, await asyncio.gather(*(sheets_service.get_version(t) for t in tabs))))
+    
+    versions = []
+    for source in sources:
+        if source in SHEET_TABS:
+            versions.append(tab_versions[source])
+        elif source == "incremental":
+            versions.append(incremental_metrics.version())
+        elif source == "today":
+            # Month/quarter windows in the calculations roll over with the date
+            versions.append(datetime.now().date().isoformat())
+        else:
+            versions.append(ADMIN_DATA_VERSIONS[source])
+    return versions
+
+def conditional_get(*sources: str):
+    """
+    Route dependency that answers If-None-Match with 304 before the endpoint
+    runs, when the route's data sources and the caller's permissions are unchanged
+    """
+    async def check(request: Request, response: Response):
+        # Lets ResponseCacheMiddleware store the response and invalidate it by source
+        request.state.cache_tags = sources
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        etag = make_etag(
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            await content_version(sources),
+            caller_permission_fingerprint(request.headers.get("authorization"))
+        )
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            conditional_get_stats.record(route, hit=True)
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        conditional_get_stats.record(route, hit=False)
+        response.headers.update(headers)
+    return check
+
+async def authenticated(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict:
+    """
+    Route dependency resolving the caller (401 otherwise); list it ahead of
+    conditional_get so an unauthenticated request never gets a 304
+    """
+    return get_user_from_token(credentials)
+
 
 # ============================================
 # AUTH ENDPOINTS
@@ -394,6 +700,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Invalid token"
         )
     
+    annotate("user_id", user["id"])
     return user
 
 @app.get("/api/permissions/me")
@@ -416,58 +723,69 @@ async def get_my_permissions(credentials: HTTPAuthorizationCredentials = Depends
     
     return {"permissions": user["permissions"]}
 
+@app.get("/api/permissions/me/effective")
+async def get_my_effective_permissions(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Current user's permissions as stored in the database (overrides, then role defaults)"""
+    user = get_user_from_token(credentials)
+    
+    from services.permission_service import AsyncPermissionService
+    
+    try:
+        permissions = await AsyncPermissionService(db).get_user_effective_permissions(user["id"])
+        return {"permissions": permissions}
+    except Exception as e:
+        logger.error("Error resolving effective permissions: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error resolving permissions: {str(e)}")
+
 # ============================================
 # METRICS ENDPOINTS
 # ============================================
 
-@app.get("/api/metrics/mrr", response_model=MetricResponse)
-async def get_mrr(credentials: HTTPAuthorizationCredentials = Depends(security)):
+@app.get("/api/metrics/mrr", response_model=MetricResponse, dependencies=[Depends(conditional_get("customers", "snapshots", "incremental", "today"))])
+async def get_mrr(response: Response, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get MRR metric from Google Sheets"""
     try:
-        customers = await sheets_service.get_customers()
-        result = await calculate_mrr(customers)
+        if incremental_metrics.is_primed:
+            result = incremental_metrics.mrr_summary()
+        else:
+            customers = await sheets_service.get_customers()
+            result = await calculate_mrr(customers)
         
         # Generate sparkline from snapshots if available
         snapshots = await sheets_service.get_monthly_snapshots()
         sparkline = [s.get('MRR', 0) for s in snapshots[-7:]] if snapshots else [result['current_value']]
         
-        return MetricResponse(
-            current_value=result['current_value'],
-            previous_value=result['previous_value'],
-            change_percentage=result['change_percentage'],
-            trend=result['trend'],
-            sparkline=sparkline,
-            last_updated=datetime.now().isoformat()
-        )
+        return metric_response(result, sparkline, response)
     except Exception as e:
-        print(f"Error calculating MRR: {str(e)}")
+        logger.error("Error calculating MRR: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching MRR: {str(e)}")
 
-@app.get("/api/metrics/cac", response_model=MetricResponse)
-async def get_cac(credentials: HTTPAuthorizationCredentials = Depends(security)):
+@app.get("/api/metrics/cac", response_model=MetricResponse, dependencies=[Depends(conditional_get("customers", "expenses", "incremental", "today"))])
+async def get_cac(response: Response, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get CAC metric from Google Sheets"""
     try:
-        customers = await sheets_service.get_customers()
-        expenses = await sheets_service.get_expenses()
-        result = await calculate_cac(customers, expenses)
+        if incremental_metrics.is_primed:
+            result = incremental_metrics.cac_summary()
+        else:
+            # Customers and Expenses are fetched concurrently
+            resolved = await metrics_graph.resolve(["cac"], timeout=settings.METRICS_REQUEST_TIMEOUT)
+            result = resolved["cac"]
         
         # Sparkline placeholder
         sparkline = [result['current_value']] * 7
         
-        return MetricResponse(
-            current_value=result['current_value'],
-            previous_value=result['previous_value'],
-            change_percentage=result['change_percentage'],
-            trend=result['trend'],
-            sparkline=sparkline,
-            last_updated=datetime.now().isoformat()
-        )
+        return metric_response(result, sparkline, response)
+    except DependencyTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        print(f"Error calculating CAC: {str(e)}")
+        logger.error("Error calculating CAC: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching CAC: {str(e)}")
 
-@app.get("/api/metrics/ltv", response_model=MetricResponse)
-async def get_ltv(credentials: HTTPAuthorizationCredentials = Depends(security)):
+@app.get("/api/metrics/ltv", response_model=MetricResponse, dependencies=[Depends(conditional_get("customers"))])
+async def get_ltv(response: Response, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get LTV metric from Google Sheets"""
     try:
         customers = await sheets_service.get_customers()
@@ -475,41 +793,30 @@ async def get_ltv(credentials: HTTPAuthorizationCredentials = Depends(security))
         
         sparkline = [result['current_value']] * 7
         
-        return MetricResponse(
-            current_value=result['current_value'],
-            previous_value=result['previous_value'],
-            change_percentage=result['change_percentage'],
-            trend=result['trend'],
-            sparkline=sparkline,
-            last_updated=datetime.now().isoformat()
-        )
+        return metric_response(result, sparkline, response)
     except Exception as e:
-        print(f"Error calculating LTV: {str(e)}")
+        logger.error("Error calculating LTV: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching LTV: {str(e)}")
 
-@app.get("/api/metrics/qvc", response_model=MetricResponse)
-async def get_qvc(credentials: HTTPAuthorizationCredentials = Depends(security)):
+@app.get("/api/metrics/qvc", response_model=MetricResponse, dependencies=[Depends(conditional_get("projects", "incremental", "today"))])
+async def get_qvc(response: Response, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get QVC metric from Google Sheets"""
     try:
-        projects = await sheets_service.get_projects()
-        result = await calculate_qvc(projects)
+        if incremental_metrics.is_primed:
+            result = incremental_metrics.qvc_summary()
+        else:
+            projects = await sheets_service.get_projects()
+            result = await calculate_qvc(projects)
         
         sparkline = [result['current_value']] * 7
         
-        return MetricResponse(
-            current_value=result['current_value'],
-            previous_value=result['previous_value'],
-            change_percentage=result['change_percentage'],
-            trend=result['trend'],
-            sparkline=sparkline,
-            last_updated=datetime.now().isoformat()
-        )
+        return metric_response(result, sparkline, response)
     except Exception as e:
-        print(f"Error calculating QVC: {str(e)}")
+        logger.error("Error calculating QVC: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching QVC: {str(e)}")
 
-@app.get("/api/metrics/ltgp", response_model=MetricResponse)
-async def get_ltgp(credentials: HTTPAuthorizationCredentials = Depends(security)):
+@app.get("/api/metrics/ltgp", response_model=MetricResponse, dependencies=[Depends(conditional_get("customers"))])
+async def get_ltgp(response: Response, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get LTGP metric from Google Sheets"""
     try:
         customers = await sheets_service.get_customers()
@@ -517,32 +824,55 @@ async def get_ltgp(credentials: HTTPAuthorizationCredentials = Depends(security)
         
         sparkline = [result['current_value']] * 7
         
-        return MetricResponse(
-            current_value=result['current_value'],
-            previous_value=result['previous_value'],
-            change_percentage=result['change_percentage'],
-            trend=result['trend'],
-            sparkline=sparkline,
-            last_updated=datetime.now().isoformat()
-        )
+        return metric_response(result, sparkline, response)
     except Exception as e:
-        print(f"Error calculating LTGP: {str(e)}")
+        logger.error("Error calculating LTGP: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching LTGP: {str(e)}")
 
+@app.get("/api/metrics/stream")
+async def stream_metrics(
+    request: Request,
+    token: Optional[str] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    Server-Sent Events stream of metric changes. EventSource can't send
+    headers, so the access token may also be passed as ?token=
+    """
+    if token and not credentials:
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    user = get_user_from_token(credentials)
+    
+    try:
+        subscriber = await metric_stream_broker.subscribe(user)
+    except Exception as e:
+        logger.error("Error opening metric stream: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error opening metric stream: {str(e)}")
+    
+    async def event_source():
+        try:
+            async for frame in metric_stream_broker.events(subscriber, request.is_disconnected):
+                yield frame
+        finally:
+            metric_stream_broker.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ============================================
 # ADVANCED METRICS ENDPOINTS
 # ============================================
 
-@app.get("/api/metrics/ratios")
+@app.get("/api/metrics/ratios", dependencies=[Depends(conditional_get("customers", "expenses", "today"))])
 async def get_metric_ratios(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get calculated business ratios with health indicators from Google Sheets"""
     try:
-        customers = await sheets_service.get_customers()
-        
-        # Calculate current metrics
-        mrr_data = await calculate_mrr(customers)
-        cac_data = await calculate_cac(customers, await sheets_service.get_expenses())
-        ltv_data = await calculate_ltv(customers)
+        # Fetch both tabs concurrently; each metric runs as soon as its inputs are ready
+        resolved = await metrics_graph.resolve(["mrr", "cac", "ltv"], timeout=settings.METRICS_REQUEST_TIMEOUT)
+        mrr_data, cac_data, ltv_data = resolved["mrr"], resolved["cac"], resolved["ltv"]
         
         mrr = mrr_data['current_value']
         cac = cac_data['current_value']
@@ -571,11 +901,211 @@ async def get_metric_ratios(credentials: HTTPAuthorizationCredentials = Depends(
             "burn_multiple": round(burn_multiple, 2),
             "calculated_at": datetime.now().isoformat()
         }
+    except DependencyTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        print(f"Error calculating ratios: {str(e)}")
+        logger.error("Error calculating ratios: %s", e)
         raise HTTPException(status_code=500, detail=f"Error calculating ratios: {str(e)}")
 
-@app.get("/api/metrics/{metric_name}/history")
+@app.get("/api/metrics/mrr/waterfall")
+async def get_mrr_waterfall(
+    limit: int = 12,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get stored MRR components (new/expansion/contraction/churn), newest period first"""
+    require_permission(credentials, "metrics.mrr.view")
+    
+    from models.business_metric import MRRComponent
+    from schemas.metrics import MRRComponentResponse
+    
+    try:
+        rows = await db.scalars(select(MRRComponent).order_by(MRRComponent.period_end.desc()).limit(limit))
+        return {"periods": [MRRComponentResponse.model_validate(r) for r in rows]}
+    except Exception as e:
+        logger.error("Error fetching MRR waterfall: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error fetching MRR waterfall: {str(e)}")
+
+@app.post("/api/metrics/mrr/waterfall/rebuild")
+async def rebuild_mrr_waterfall(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Recompute this month's MRR waterfall from the Customers tab and store it (CEO only)"""
+    admin_user = get_user_from_token(credentials)
+    check_admin_access(admin_user)
+    
+    try:
+        customers = await sheets_service.get_customers()
+        period = mrr_waterfall_engine.from_customers(customers)
+        mrr_waterfall_engine.persist(db, [period])
+        return period
+    except Exception as e:
+        logger.error("Error rebuilding MRR waterfall: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error rebuilding MRR waterfall: {str(e)}")
+
+@app.get("/api/metrics/cohorts")
+async def get_customer_cohorts(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get the cohort x age retention and revenue matrix (cached)"""
+    require_permission(credentials, "metrics.ltv.view")
+    
+    try:
+        return await cohort_engine.get_matrix(db)
+    except Exception as e:
+        logger.error("Error fetching cohorts: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error fetching cohorts: {str(e)}")
+
+@app.post("/api/metrics/cohorts/rebuild")
+async def rebuild_customer_cohorts(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Recompute the cohort matrix from the Customers tab and store it (CEO only)"""
+    admin_user = get_user_from_token(credentials)
+    check_admin_access(admin_user)
+    
+    try:
+        customers = await sheets_service.get_customers()
+        rows = cohort_engine.to_rows(cohort_engine.compute_matrix(customers))
+        return {"cells_written": cohort_engine.persist(db, rows)}
+    except Exception as e:
+        logger.error("Error rebuilding cohorts: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error rebuilding cohorts: {str(e)}")
+
+@app.get("/api/metrics/ltv/segments")
+async def get_ltv_segments(
+    segment_type: Optional[str] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Drill into materialized LTV, churn and margin by industry, plan duration or company size"""
+    require_permission(credentials, "metrics.ltv.view")
+
+    if segment_type and segment_type not in segment_ltv_job.SEGMENT_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid segment_type. Must be one of: {', '.join(segment_ltv_job.SEGMENT_TYPES)}"
+        )
+
+    from models.business_metric import LTVBySegment
+    from schemas.metrics import LTVBySegmentResponse
+
+    try:
+        query = select(LTVBySegment)
+        if segment_type:
+            query = query.where(LTVBySegment.segment_type == segment_type)
+        rows = await db.scalars(query.order_by(LTVBySegment.segment_type, LTVBySegment.calculated_ltv.desc()))
+        return {"segments": [LTVBySegmentResponse.model_validate(r) for r in rows]}
+    except Exception as e:
+        logger.error("Error fetching LTV segments: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error fetching LTV segments: {str(e)}")
+
+@app.post("/api/metrics/ltv/segments/rebuild")
+async def rebuild_ltv_segments(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Recompute LTV for every segment from the Customers and Expenses tabs (CEO only)"""
+    admin_user = get_user_from_token(credentials)
+    check_admin_access(admin_user)
+
+    try:
+        customers = await sheets_service.get_customers()
+        expenses = await sheets_service.get_expenses()
+        rows = await segment_ltv_job.compute(customers, expenses)
+        return {"segments_written": segment_ltv_job.persist(db, rows)}
+    except Exception as e:
+        logger.error("Error rebuilding LTV segments: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error rebuilding LTV segments: {str(e)}")
+
+@app.get("/api/metrics/cac/channels")
+async def get_cac_channels(
+    months: int = 12,
+    channel: Optional[str] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get materialized CAC by acquisition channel, newest month first"""
+    require_permission(credentials, "metrics.cac.view")
+
+    from models.business_metric import CACByChannel
+    from schemas.metrics import CACByChannelResponse
+
+    try:
+        periods = list(await db.scalars(
+            select(CACByChannel.period_start).distinct()
+            .order_by(CACByChannel.period_start.desc()).limit(months)
+        ))
+        query = select(CACByChannel).where(CACByChannel.period_start.in_(periods))
+        if channel:
+            query = query.where(CACByChannel.channel == channel)
+        rows = await db.scalars(query.order_by(CACByChannel.period_start.desc(), CACByChannel.channel))
+        return {"channels": [CACByChannelResponse.model_validate(r) for r in rows]}
+    except Exception as e:
+        logger.error("Error fetching CAC by channel: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error fetching CAC by channel: {str(e)}")
+
+@app.post("/api/metrics/cac/channels/rebuild")
+async def rebuild_cac_channels(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Re-attribute every historical month of spend and new customers to channels (CEO only)"""
+    admin_user = get_user_from_token(credentials)
+    check_admin_access(admin_user)
+
+    try:
+        customers = await sheets_service.get_customers()
+        expenses = await sheets_service.get_expenses()
+        rows = cac_attribution_engine.compute(customers, expenses)
+        return {"rows_written": cac_attribution_engine.persist(db, rows)}
+    except Exception as e:
+        logger.error("Error rebuilding CAC by channel: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error rebuilding CAC by channel: {str(e)}")
+
+@app.get("/api/metrics/stored")
+async def get_stored_metrics(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Latest stored business metrics the caller may view (users not yet synced to the database get none)"""
+    user = get_user_from_token(credentials)
+    
+    from services.metrics_service import async_metrics_service
+    
+    try:
+        return {"metrics": await async_metrics_service.get_user_metrics(db, user["id"])}
+    except Exception as e:
+        logger.error("Error fetching stored metrics: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error fetching stored metrics: {str(e)}")
+
+@app.get("/api/metrics/{metric_type}/stored-history")
+async def get_stored_metric_history(
+    metric_type: str,
+    limit: int = Query(12, ge=1, le=120),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Recorded values of one metric from metric_history, newest period first"""
+    user = get_user_from_token(credentials)
+    
+    from services.metrics_service import async_metrics_service
+    from schemas.metrics import MetricHistoryResponse
+    
+    if not await async_metrics_service.check_metric_permission(db, user["id"], metric_type):
+        raise HTTPException(status_code=403, detail=f"Permission denied: metrics.{metric_type}.view")
+    
+    try:
+        rows = await async_metrics_service.get_metric_history(db, metric_type, limit)
+        return {"history": [MetricHistoryResponse.model_validate(r) for r in rows]}
+    except Exception as e:
+        logger.error("Error fetching stored history for %s: %s", metric_type, e)
+        raise HTTPException(status_code=500, detail=f"Error fetching metric history: {str(e)}")
+
+@app.get("/api/metrics/{metric_name}/history", dependencies=[Depends(conditional_get("snapshots"))])
 async def get_metric_history(
     metric_name: str,
     days: int = 30,
@@ -620,22 +1150,23 @@ async def get_metric_history(
         
         return {"history": history}
     except Exception as e:
-        print(f"Error fetching history for {metric_name}: {str(e)}")
+        logger.error("Error fetching history for %s: %s", metric_name, e)
         # Return empty history instead of error to prevent UI breaking
         return {"history": []}
 
 
-@app.get("/api/metrics/additional")
+@app.get("/api/metrics/additional", dependencies=[Depends(authenticated), Depends(conditional_get("customers", "expenses", "today"))])
 async def get_additional_metrics(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get additional AI consultancy metrics from Google Sheets"""
     try:
-        customers = await sheets_service.get_customers()
-        expenses = await sheets_service.get_expenses()
-        
-        # Calculate real metrics
-        nrr = await calculate_nrr(customers)
-        gross_margin = await calculate_gross_margin(customers, expenses)
-        customer_concentration = await calculate_customer_concentration(customers)
+        # Calculate real metrics (Customers and Expenses fetched concurrently)
+        resolved = await metrics_graph.resolve(
+            ["nrr", "gross_margin", "customer_concentration"],
+            timeout=settings.METRICS_REQUEST_TIMEOUT
+        )
+        nrr = resolved["nrr"]
+        gross_margin = resolved["gross_margin"]
+        customer_concentration = resolved["customer_concentration"]
         
         # Helper functions
         def get_status(current, target):
@@ -703,8 +1234,10 @@ async def get_additional_metrics(credentials: HTTPAuthorizationCredentials = Dep
         ]
         
         return {"metrics": metrics_data}
+    except DependencyTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        print(f"Error fetching additional metrics: {str(e)}")
+        logger.error("Error fetching additional metrics: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching additional metrics: {str(e)}")
 
 # ============================================
@@ -781,30 +1314,16 @@ async def test_alfred_openai():
 @app.post("/api/alfred/chat", response_model=AlfredResponse)
 async def alfred_chat(
     message: AlfredMessage,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
 ):
-    """Chat with Alfred AI - Real OpenAI Integration"""
+    """Chat with Alfred AI - Real OpenAI Integration (metric reads may come from the replica until the first write)"""
     try:
         # Lazy import to avoid startup crashes
         from services.alfred_service import get_alfred_service
-        from database.connection import engine, Base, get_db
         from utils.sync_db import sync_user_to_db
-        from sqlalchemy.orm import Session
-        
-        print("✅ Imports successful, creating DB tables...")
-        
-        # Initialize DB tables if needed (safe - only creates if not exists)
-        Base.metadata.create_all(bind=engine)
-        
-        # Get DB session
-        db = next(get_db())
         
         # Get current user
-        print(f"🔑 Credentials object: {credentials}")
-        print(f"🔑 Credentials type: {type(credentials)}")
-        if credentials:
-            print(f"🔑 Credentials.credentials: {credentials.credentials[:20] if credentials.credentials else 'NONE'}...")
-        
         if not credentials:
             raise HTTPException(status_code=401, detail="Not authenticated")
         
@@ -813,13 +1332,15 @@ async def alfred_chat(
         
         if not user:
             raise HTTPException(status_code=401, detail="Invalid token")
+        annotate("user_id", user["id"])
         
-        # Sync user to DB
-        db_user = sync_user_to_db(user, db)
+        # Sync user to DB (on the primary: a user created by the previous request may not be replicated yet)
+        with reading_from_primary(db):
+            db_user = sync_user_to_db(user, db)
         
         # Get Alfred service instance (lazy loaded)
         alfred_service = get_alfred_service()
-        print(f"✅ Alfred service ready, calling chat with: '{message.message}'")
+        logger.debug("Alfred chat request", extra={"user_id": db_user.id, "conversation_id": message.conversation_id})
         
         # Call real Alfred service
         response_text, conversation_id, function_calls = await alfred_service.chat(
@@ -832,8 +1353,6 @@ async def alfred_chat(
             dashboard_context=message.dashboard_context
         )
         
-        db.close()
-        
         return AlfredResponse(
             message=response_text,
             conversation_id=conversation_id,
@@ -842,11 +1361,10 @@ async def alfred_chat(
         )
         
     except Exception as e:
-        # If anything fails, return helpful error message
+        # If anything fails, return helpful error message (and keep partial writes out of the request transaction)
+        db.rollback()
         error_msg = str(e)
-        import traceback
-        print(f"❌ Alfred error: {error_msg}")
-        print(f"❌ Full traceback:\n{traceback.format_exc()}")
+        logger.exception("Alfred error: %s", error_msg)
         
         return AlfredResponse(
             message=f"I apologize, but I encountered an issue: {error_msg[:200]}. Please check that the OpenAI API key is configured in the .env file.",
@@ -937,7 +1455,7 @@ async def get_messages(
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     messages = conversation["messages"][offset:offset + limit]
-    return {"messages": messages, "total": len(conversation["messages"])}
+    return FastJSONResponse({"messages": messages, "total": len(conversation["messages"])})
 
 @app.post("/api/chat/send")
 async def send_message(
@@ -1229,13 +1747,28 @@ async def reset_to_defaults(credentials: HTTPAuthorizationCredentials = Depends(
 # HEALTH CHECK
 # ============================================
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    """Backend internals in the Prometheus text format (bearer METRICS_SCRAPE_TOKEN; open without one only in development/test)"""
+    if not settings.METRICS_SCRAPE_TOKEN:
+        if settings.ENVIRONMENT not in ("development", "test"):
+            raise HTTPException(status_code=403, detail="Metrics disabled: METRICS_SCRAPE_TOKEN is not set")
+    elif request.headers.get("authorization") != f"Bearer {settings.METRICS_SCRAPE_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid scrape token")
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/")
 def read_root():
     return {"message": "Synops Labs API is running", "version": "1.0.0"}
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+async def health_check():
+    # Runs on the event loop (not the threadpool), so its latency doubles as a loop-stall probe
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "warmup": getattr(app.state, "warmup", None)
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -1263,6 +1796,35 @@ def get_user_from_token(credentials: HTTPAuthorizationCredentials) -> Dict:
     
     return user
 
+def require_permission(credentials: HTTPAuthorizationCredentials, feature_key: str) -> Dict:
+    """Resolve the caller and verify they hold a feature permission (CEO always passes)"""
+    user = get_user_from_token(credentials)
+    if user.get("hierarchy_level") != 1 and not user.get("permissions", {}).get(feature_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Missing permission: {feature_key}"
+        )
+    return user
+
+def json_response(content: Any, response: Response) -> FastJSONResponse:
+    """
+    Serialize plain, already-validated content straight to JSON, keeping the
+    headers dependencies set on `response` (ETag, Cache-Control)
+    """
+    return FastJSONResponse(content, headers=dict(response.headers))
+
+def metric_response(result: Dict, sparkline: List[float], response: Response) -> FastJSONResponse:
+    """MetricResponse built with model_construct: the values come from our own calculations"""
+    metric = MetricResponse.model_construct(
+        current_value=result['current_value'],
+        previous_value=result['previous_value'],
+        change_percentage=result['change_percentage'],
+        trend=result['trend'],
+        sparkline=sparkline,
+        last_updated=datetime.now().isoformat()
+    )
+    return json_response(metric.model_dump(), response)
+
 def check_admin_access(user: Dict) -> None:
     """Verify user has admin access (CEO only)"""
     if user.get("hierarchy_level") != 1:
@@ -1273,6 +1835,7 @@ def check_admin_access(user: Dict) -> None:
 
 def log_audit_event(user_id: int, user_name: str, action: str, details: str, ip: str = "127.0.0.1") -> None:
     """Log an audit event"""
+    bump_admin_version("logs")
     AUDIT_LOGS.append({
         "id": len(AUDIT_LOGS) + 1,
         "user_id": user_id,
@@ -1356,7 +1919,7 @@ def get_default_permissions(hierarchy_level: int, department: str) -> Dict[str,
 # ADMIN API ENDPOINTS
 # ============================================
 
-@app.get("/api/admin/users")
+@app.get("/api/admin/users", dependencies=[Depends(conditional_get("users"))])
 async def get_all_users(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     skip: int = 0,
@@ -1425,6 +1988,7 @@ async def create_user(
     }
     
     MOCK_USERS[user_data.email] = new_user
+    bump_admin_version("users")
     
     # Log audit event
     log_audit_event(
@@ -1436,7 +2000,7 @@ async def create_user(
     
     return new_user
 
-@app.get("/api/admin/users/{user_id}")
+@app.get("/api/admin/users/{user_id}", dependencies=[Depends(conditional_get("users"))])
 async def get_user(
     user_id: int,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -1487,6 +2051,9 @@ async def update_user(
             target_user[field] = value
     
     target_user["updated_at"] = datetime.now().isoformat()
+    bump_admin_version("users")
+    if "permissions" in update_data or "hierarchy_level" in update_data:
+        response_cache.clear()
     
     # Log audit event
     log_audit_event(
@@ -1523,6 +2090,7 @@ async def delete_user(
     # Soft delete
     target_user["is_active"] = False
     target_user["updated_at"] = datetime.now().isoformat()
+    bump_admin_version("users")
     
     # Log audit event
     log_audit_event(
@@ -1534,7 +2102,7 @@ async def delete_user(
     
     return {"message": "User deleted successfully"}
 
-@app.get("/api/admin/users/{user_id}/permissions")
+@app.get("/api/admin/users/{user_id}/permissions", dependencies=[Depends(conditional_get("users"))])
 async def get_user_permissions(
     user_id: int,
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -1579,6 +2147,8 @@ async def update_user_permissions(
     # Update permissions
     target_user["permissions"] = permission_data.permissions
     target_user["updated_at"] = datetime.now().isoformat()
+    bump_admin_version("users")
+    response_cache.clear()
     
     # Log audit event
     log_audit_event(
@@ -1610,6 +2180,8 @@ async def sync_all_permissions(
             user["department"]
         )
         updated_count += 1
+    bump_admin_version("users")
+    response_cache.clear()
     
     log_audit_event(
         admin_user["id"],
@@ -1624,8 +2196,9 @@ async def sync_all_permissions(
     }
 
 
-@app.get("/api/admin/logs")
+@app.get("/api/admin/logs", dependencies=[Depends(conditional_get("logs"))])
 async def get_audit_logs(
+    response: Response,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     skip: int = 0,
     limit: int = 50,
@@ -1651,14 +2224,14 @@ async def get_audit_logs(
     total = len(logs)
     logs = logs[skip:skip + limit]
     
-    return {
+    return json_response({
         "data": logs,
         "total": total,
         "page": skip // limit + 1,
         "limit": limit
-    }
+    }, response)
 
-@app.get("/api/admin/config")
+@app.get("/api/admin/config", dependencies=[Depends(conditional_get("config"))])
 async def get_system_config(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
@@ -1682,6 +2255,7 @@ async def update_system_config(
     for field, value in update_data.items():
         if value is not None:
             SYSTEM_CONFIG[field] = value
+    bump_admin_version("config")
     
     # Log audit event
     log_audit_event(
@@ -1693,6 +2267,118 @@ async def update_system_config(
     
     return SYSTEM_CONFIG
 
+@app.get("/api/admin/cache/stats")
+async def get_cache_stats(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Get 304 and shared response cache hit rates (CEO only)"""
+    admin_user = get_user_from_token(credentials)
+    check_admin_access(admin_user)
+
+    return {
+        "conditional_get": conditional_get_stats.snapshot(),
+        "response_cache": response_cache.stats()
+    }
+
+@app.get("/api/admin/timing/stats")
+async def get_timing_stats(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Per-route latency histograms, split by stage (CEO only)"""
+    admin_user = get_user_from_token(credentials)
+    check_admin_access(admin_user)
+
+    return route_timings.snapshot()
+
+@app.get("/api/admin/slow-requests")
+async def get_slow_requests(
+    limit: int = 50,
+    route: Optional[str] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Recent requests over SLOW_REQUEST_THRESHOLD_MS with their timings and context (CEO only)"""
+    admin_user = get_user_from_token(credentials)
+    check_admin_access(admin_user)
+
+    return {
+        "threshold_ms": slow_request_log.threshold_ms,
+        "total_recorded": slow_request_log.total_recorded,
+        "requests": slow_request_log.snapshot(limit, route)
+    }
+
+@app.delete("/api/admin/slow-requests")
+async def clear_slow_requests(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Empty the slow request buffer (CEO only)"""
+    admin_user = get_user_from_token(credentials)
+    check_admin_access(admin_user)
+
+    slow_request_log.clear()
+    return {"success": True}
+
+@app.get("/api/admin/sql/stats")
+async def get_sql_stats(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Statement shapes repeated within a single request per route, and sessions left open (CEO only)"""
+    admin_user = get_user_from_token(credentials)
+    check_admin_access(admin_user)
+
+    return {
+        "n_plus_one": n_plus_one_detector.snapshot(),
+        "session_leaks": session_leak_detector.snapshot(),
+        "replica": replica_monitor.snapshot()
+    }
+
+@app.get("/api/admin/profile/cpu")
+async def profile_cpu(
+    seconds: float = Query(10, gt=0, le=profiler.MAX_SECONDS),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    format: str = "collapsed",
+    include_idle: bool = False,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    Sample every thread's stack for `seconds` (max 60). format=collapsed returns
+    flamegraph.pl/speedscope input; format=json returns the top functions.
+    """
+    require_permission(credentials, "admin.config.view")
+    if format not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'json'")
+
+    try:
+        profile = await asyncio.to_thread(profiler.sample, seconds, interval_ms / 1000, include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed(profile))
+    return {
+        "duration_seconds": profile["duration_seconds"],
+        "interval_seconds": profile["interval_seconds"],
+        "samples": profile["samples"],
+        "top_functions": profiler.top_functions(profile)
+    }
+
+@app.get("/api/admin/profile/memory")
+async def profile_memory(
+    seconds: float = Query(10, ge=0, le=profiler.MAX_SECONDS),
+    limit: int = Query(25, ge=1, le=500),
+    group_by: str = "lineno",
+    frames: int = Query(1, ge=1, le=100),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Top tracemalloc allocators (traced for `seconds`, max 60, unless tracemalloc is already running)"""
+    require_permission(credentials, "admin.config.view")
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="group_by must be 'lineno', 'filename' or 'traceback'")
+
+    try:
+        return await asyncio.to_thread(profiler.memory_snapshot, seconds, limit, group_by, frames)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @app.get("/api/admin/roles")
 async def get_roles(
     credentials: HTTPAuthorizationCredentials = Depends(security)
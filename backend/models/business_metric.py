@@ -3,7 +3,7 @@ Business Metrics Models
 SQLAlchemy models for business metrics tracking and permissions
 """
 
-from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, Boolean, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, Boolean, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -24,6 +24,27 @@ class BusinessMetric(Base):
     meta_data = Column(JSON)  # Changed from JSONB to JSON for cross-database compatibility
     calculated_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # One row per metric and period: the upsert conflict target, and the index every
+        # lookup uses (they all filter on metric_type and sort or match on period_end)
+        Index("uix_business_metrics_type_period", "metric_type", "period_end", unique=True),
+    )
+
+
+class LatestMetric(Base):
+    """Newest business_metrics row per metric type, refreshed on every write so dashboard reads are a key lookup"""
+    __tablename__ = "latest_metrics"
+    
+    metric_type = Column(String(50), primary_key=True)
+    business_metric_id = Column(Integer, ForeignKey("business_metrics.id", ondelete="SET NULL"))
+    current_value = Column(Numeric(15, 2))
+    previous_value = Column(Numeric(15, 2))
+    change_percentage = Column(Numeric(5, 2))
+    period_start = Column(Date)
+    period_end = Column(Date)
+    meta_data = Column(JSON)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class MetricHistory(Base):
@@ -37,6 +58,10 @@ class MetricHistory(Base):
     period_end = Column(Date)
     meta_data = Column(JSON)
     recorded_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_metric_history_type_period", "metric_type", "period_end"),
+    )
 
 
 class MetricPermission(Base):
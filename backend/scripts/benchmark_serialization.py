@@ -0,0 +1,140 @@
+"""
+Serialization Benchmark
+Compares the default FastAPI response path with the fast JSON path on the largest payloads
+
+Usage: python scripts/benchmark_serialization.py [--rows 10000] [--repeat 20]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from typing import List
+
+from utils.fast_json import dumps, orjson
+
+
+class MetricResponse(BaseModel):
+    """Mirror of main.MetricResponse (importing main would pull in the whole app)"""
+    current_value: float
+    previous_value: float
+    change_percentage: float
+    trend: str
+    sparkline: List[float]
+    last_updated: str
+
+
+def build_audit_logs(rows: int) -> dict:
+    now = datetime.now()
+    logs = [{
+        "id": i,
+        "user_id": i % 12 + 1,
+        "user_name": f"User {i % 12 + 1}",
+        "action": ["user_updated", "permission_updated", "config_updated"][i % 3],
+        "details": f"Updated permissions for: User {i % 12 + 1} (user{i % 12 + 1}@synopslabs.com)",
+        "ip_address": "127.0.0.1",
+        "timestamp": (now - timedelta(minutes=i)).isoformat()
+    } for i in range(rows)]
+    return {"data": logs, "total": rows, "page": 1, "limit": rows}
+
+
+def build_chat_messages(rows: int) -> dict:
+    now = datetime.now()
+    messages = [{
+        "id": f"msg-{i}",
+        "content": "Hey, how's the dashboard coming along? " * 3,
+        "timestamp": (now - timedelta(seconds=i * 30)).isoformat(),
+        "senderId": i % 2 + 1,
+        "isFromCurrentUser": bool(i % 2),
+        "isRead": True
+    } for i in range(rows)]
+    return {"messages": messages, "total": rows}
+
+
+def build_db_rows(rows: int) -> dict:
+    """Shape of the SQLAlchemy-backed endpoints: Numeric columns arrive as Decimal, dates as datetime"""
+    now = datetime.now()
+    return {"segments": [{
+        "id": i,
+        "segment_type": "industry",
+        "segment_value": f"Segment {i}",
+        "avg_revenue_per_customer": Decimal("2450.50"),
+        "churn_rate": Decimal("4.25"),
+        "calculated_ltv": Decimal("29406.00"),
+        "customer_count": 40 + i,
+        "calculated_at": now
+    } for i in range(rows)]}
+
+
+def default_path(content) -> bytes:
+    """What FastAPI does for a plain dict return: jsonable_encoder + stdlib JSONResponse.render"""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def metric_default(values: dict) -> bytes:
+    """response_model path: validate into MetricResponse, then encode"""
+    return default_path(MetricResponse(**values))
+
+
+def metric_fast(values: dict) -> bytes:
+    """model_construct (no re-validation) + fast serializer"""
+    return dumps(MetricResponse.model_construct(**values).model_dump())
+
+
+def timeit(fn, arg, repeat: int) -> float:
+    fn(arg)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    metric = {
+        "current_value": 125000.0, "previous_value": 118000.0, "change_percentage": 5.93,
+        "trend": "up", "sparkline": [110000.0, 112500.0, 115000.0, 118000.0, 121000.0, 123000.0, 125000.0],
+        "last_updated": datetime.now().isoformat()
+    }
+
+    cases = [
+        ("/api/metrics/mrr (1000 responses)", lambda v: [metric_default(v) for _ in range(1000)],
+         lambda v: [metric_fast(v) for _ in range(1000)], metric, metric_fast(metric)),
+    ]
+    for name, payload in [
+        (f"/api/admin/logs ({args.rows} rows)", build_audit_logs(args.rows)),
+        (f"/api/chat/messages ({args.rows} rows)", build_chat_messages(args.rows)),
+        (f"Decimal/datetime rows ({args.rows} rows)", build_db_rows(args.rows)),
+    ]:
+        cases.append((name, default_path, dumps, payload, dumps(payload)))
+
+    print(f"Serializer: {'orjson ' + orjson.__version__ if orjson else 'stdlib json (orjson not installed)'}")
+    print("=" * 78)
+    print(f"{'payload':<38}{'before ms':>11}{'after ms':>11}{'speedup':>9}{'gzip':>9}")
+    print("-" * 78)
+    for name, before_fn, after_fn, payload, body in cases:
+        before = timeit(before_fn, payload, args.repeat)
+        after = timeit(after_fn, payload, args.repeat)
+        ratio = len(gzip.compress(body, compresslevel=6)) / len(body) * 100
+        print(f"{name:<38}{before:>11.2f}{after:>11.2f}{before / after:>8.1f}x{ratio:>8.0f}%")
+    print("=" * 78)
+    print("gzip = compressed size as % of the JSON body (CompressionMiddleware, level 6)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+SQLite Concurrency Benchmark
+Read/write throughput of concurrent conversation-style writers and metric readers, default settings vs the tuned pragmas
+
+Usage: python scripts/benchmark_sqlite_pragmas.py [--writers 4] [--readers 8] [--seconds 10]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import apply_sqlite_pragmas, sqlite_pragmas
+
+SCHEMA = """
+CREATE TABLE alfred_sessions (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    conversation TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX ix_alfred_sessions_user ON alfred_sessions (user_id, updated_at);
+"""
+
+
+def connect(path: str, pragmas: list) -> sqlite3.Connection:
+    # Same driver defaults SQLAlchemy uses (5s lock wait), plus the pragmas under test
+    connection = sqlite3.connect(path, check_same_thread=False)
+    if pragmas:
+        apply_sqlite_pragmas(connection, pragmas)
+    return connection
+
+
+def writer(path: str, pragmas: list, deadline: float, worker: int, stats: dict):
+    connection = connect(path, pragmas)
+    message = {"role": "user", "content": "How is MRR trending this quarter?" * 4}
+    n = 0
+    while time.perf_counter() < deadline:
+        try:
+            # One chat turn: create the session, then append to its history
+            cursor = connection.execute(
+                "INSERT INTO alfred_sessions (user_id, conversation, updated_at) VALUES (?, ?, ?)",
+                (worker, json.dumps([message]), time.time())
+            )
+            connection.execute(
+                "UPDATE alfred_sessions SET conversation = ?, updated_at = ? WHERE id = ?",
+                (json.dumps([message, message]), time.time(), cursor.lastrowid)
+            )
+            connection.commit()
+            n += 1
+        except sqlite3.OperationalError:
+            connection.rollback()
+            stats["write_errors"] += 1
+    connection.close()
+    stats["writes"] += n
+
+
+def reader(path: str, pragmas: list, deadline: float, worker: int, stats: dict):
+    connection = connect(path, pragmas)
+    n = 0
+    while time.perf_counter() < deadline:
+        try:
+            connection.execute(
+                "SELECT id, conversation FROM alfred_sessions WHERE user_id = ? ORDER BY updated_at DESC LIMIT 20",
+                (worker % 4,)
+            ).fetchall()
+            connection.execute("SELECT COUNT(*) FROM alfred_sessions").fetchone()
+            n += 1
+        except sqlite3.OperationalError:
+            stats["read_errors"] += 1
+    connection.close()
+    stats["reads"] += n
+
+
+def run(label: str, pragmas: list, writers: int, readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        setup = connect(path, pragmas)
+        setup.executescript(SCHEMA)
+        setup.commit()
+
+        stats = {"writes": 0, "reads": 0, "write_errors": 0, "read_errors": 0}
+        per_thread = []
+        deadline = time.perf_counter() + seconds
+        threads = []
+        for i in range(writers):
+            per_thread.append({"writes": 0, "reads": 0, "write_errors": 0, "read_errors": 0})
+            threads.append(threading.Thread(target=writer, args=(path, pragmas, deadline, i, per_thread[-1])))
+        for i in range(readers):
+            per_thread.append({"writes": 0, "reads": 0, "write_errors": 0, "read_errors": 0})
+            threads.append(threading.Thread(target=reader, args=(path, pragmas, deadline, i, per_thread[-1])))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for thread_stats in per_thread:
+            for key, value in thread_stats.items():
+                stats[key] += value
+        stats["journal_mode"] = setup.execute("PRAGMA journal_mode").fetchone()[0]
+        setup.close()
+    stats["label"] = label
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    tuned = sqlite_pragmas()
+    print(f"SQLite {sqlite3.sqlite_version}, {args.writers} writers + {args.readers} readers, {args.seconds:.0f}s each")
+    print("Tuned: " + ", ".join(f"{name}={value}" for name, value in tuned))
+    print("=" * 78)
+    print(f"{'profile':<10}{'journal':>9}{'writes/s':>12}{'reads/s':>12}{'write errs':>12}{'read errs':>12}")
+    print("-" * 78)
+    results = [
+        run("default", [], args.writers, args.readers, args.seconds),
+        run("tuned", tuned, args.writers, args.readers, args.seconds),
+    ]
+    for stats in results:
+        print(f"{stats['label']:<10}{stats['journal_mode']:>9}{stats['writes'] / args.seconds:>12.0f}"
+              f"{stats['reads'] / args.seconds:>12.0f}{stats['write_errors']:>12}{stats['read_errors']:>12}")
+    print("=" * 78)
+    print("errors = 'database is locked' after the busy wait ran out")
+
+
+if __name__ == "__main__":
+    main()
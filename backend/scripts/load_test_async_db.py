@@ -0,0 +1,113 @@
+"""
+Async DB Load Test
+Hammers the database-backed read endpoints while probing /health, to show whether DB work stalls the event loop
+
+Usage: python scripts/load_test_async_db.py [--base-url http://localhost:8000] [--workers 32] [--seconds 30]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = [
+    "/api/metrics/mrr/waterfall",
+    "/api/metrics/cohorts",
+    "/api/metrics/ltv/segments",
+    "/api/metrics/cac/channels",
+    "/api/metrics/stored",
+    "/api/metrics/mrr/stored-history",
+    "/api/permissions/me/effective",
+]
+
+
+def fetch(url: str, token: str) -> float:
+    """GET url, return latency in ms (raises on non-2xx)"""
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+    return (time.perf_counter() - started) * 1000
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def hammer(base_url: str, token: str, deadline: float, results: list, errors: list, worker: int):
+    i = worker
+    while time.perf_counter() < deadline:
+        path = ENDPOINTS[i % len(ENDPOINTS)]
+        i += 1
+        try:
+            results.append(fetch(base_url + path, token))
+        except (urllib.error.URLError, OSError) as e:
+            errors.append(f"{path}: {e}")
+
+
+def probe(base_url: str, deadline: float, interval: float, latencies: list):
+    """/health is an async route with no DB work; its latency under load is event-loop delay"""
+    while time.perf_counter() < deadline:
+        try:
+            latencies.append(fetch(base_url + "/health", ""))
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(interval)
+
+
+def summarize(name: str, values: list) -> str:
+    if not values:
+        return f"{name:<22}{'no samples':>12}"
+    return (f"{name:<22}{len(values):>8}{statistics.mean(values):>10.1f}"
+            f"{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}{max(values):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="pranav@synopslabs.com")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    token = f"mock_access_token_{args.email}"
+
+    # Idle baseline for the probe
+    baseline = []
+    probe(base_url, time.perf_counter() + 2, args.probe_interval, baseline)
+
+    results, errors, probes = [], [], []
+    deadline = time.perf_counter() + args.seconds
+    prober = threading.Thread(target=probe, args=(base_url, deadline, args.probe_interval, probes), daemon=True)
+    prober.start()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for worker in range(args.workers):
+            pool.submit(hammer, base_url, token, deadline, results, errors, worker)
+    prober.join()
+
+    print(f"{args.workers} workers for {args.seconds:.0f}s against {base_url}")
+    print("=" * 80)
+    print(f"{'series':<22}{'n':>8}{'mean ms':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    print("-" * 80)
+    print(summarize("/health idle", baseline))
+    print(summarize("/health under load", probes))
+    print(summarize("DB endpoints", results))
+    print("=" * 80)
+    print(f"Throughput: {len(results) / args.seconds:.1f} req/s, errors: {len(errors)}")
+    if errors:
+        print(json.dumps(errors[:5], indent=2))
+    if baseline and probes:
+        stall = percentile(probes, 99) - percentile(baseline, 99)
+        print(f"/health p99 grew by {stall:.1f}ms under load (event-loop delay; near zero when DB calls don't block)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Metric Index Migration
+Adds the (metric_type, period_end) indexes to business_metrics (unique, after dropping duplicate periods)
+and metric_history on existing databases, creates latest_metrics and backfills it from business_metrics.
+Safe to re-run.
+
+Usage: python scripts/migrate_metric_indexes.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, inspect, select, text
+
+from database.connection import SessionLocal, engine
+from models.business_metric import BusinessMetric, LatestMetric, MetricHistory
+import models.user, models.api_key  # noqa: F401 - register the tables the metric tables' ForeignKeys point at
+from services.metrics_service import metrics_service
+
+
+# Indexes replaced by a later definition: (table, index name)
+SUPERSEDED_INDEXES = [("business_metrics", "ix_business_metrics_type_period")]
+
+
+def superseded_indexes():
+    inspector = inspect(engine)
+    return [
+        (table, name) for table, name in SUPERSEDED_INDEXES
+        if name in {index["name"] for index in inspector.get_indexes(table)}
+    ]
+
+
+def duplicate_metric_ids(db):
+    """business_metrics rows sharing a (metric_type, period_end) with a newer row"""
+    newest = select(func.max(BusinessMetric.id)).group_by(BusinessMetric.metric_type, BusinessMetric.period_end)
+    return [
+        metric_id for (metric_id,) in db.query(BusinessMetric.id).filter(
+            BusinessMetric.period_end.isnot(None),
+            BusinessMetric.id.notin_(newest)
+        )
+    ]
+
+
+def missing_indexes():
+    inspector = inspect(engine)
+    missing = []
+    for model in (BusinessMetric, MetricHistory):
+        existing = {index["name"] for index in inspector.get_indexes(model.__tablename__)}
+        missing += [index for index in model.__table__.indexes if index.name not in existing]
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args()
+
+    indexes = missing_indexes()
+    has_latest = inspect(engine).has_table(LatestMetric.__tablename__)
+
+    for table, name in superseded_indexes():
+        print(f"{'Would drop' if args.dry_run else 'Dropping'} superseded index {name} on {table}")
+        if not args.dry_run:
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    if any(index.unique for index in indexes):
+        db = SessionLocal()
+        try:
+            duplicates = duplicate_metric_ids(db)
+            if duplicates:
+                print(f"{'Would delete' if args.dry_run else 'Deleting'} {len(duplicates)} older duplicate business_metrics rows")
+                if not args.dry_run:
+                    db.query(BusinessMetric).filter(BusinessMetric.id.in_(duplicates)).delete(synchronize_session=False)
+                    db.commit()
+        finally:
+            db.close()
+
+    for index in indexes:
+        print(f"{'Would create' if args.dry_run else 'Creating'} index {index.name} on {index.table.name}")
+        if not args.dry_run:
+            index.create(bind=engine, checkfirst=True)
+    if not indexes:
+        print("Indexes already present")
+
+    if not has_latest:
+        print(f"{'Would create' if args.dry_run else 'Creating'} table {LatestMetric.__tablename__}")
+        if not args.dry_run:
+            LatestMetric.__table__.create(bind=engine, checkfirst=True)
+
+    if args.dry_run:
+        return
+
+    db = SessionLocal()
+    try:
+        metric_types = [metric_type for (metric_type,) in db.query(BusinessMetric.metric_type).distinct()]
+        for metric_type in metric_types:
+            latest = metrics_service.refresh_latest_metric(db, metric_type)
+            print(f"  latest {metric_type}: {latest.current_value} (period ending {latest.period_end})")
+        db.commit()
+        print(f"Backfilled latest_metrics for {len(metric_types)} metric types")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,23 @@
 Alfred AI Service - OpenAI Integration with Function Calling
 """
 import json
+import logging
+import time
 import pytz
 from openai import OpenAI
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
-from config import settings
+from database.replica import reading_from_primary
 from models.alfred_session import AlfredSession
 from models.api_key import ApiKey
 from schemas.alfred import ChatMessage
 from services.metrics_service import metrics_service
+from utils.timing import span
+from utils.metrics_registry import openai_request_duration_seconds, openai_tokens_total
+
+logger = logging.getLogger(__name__)
 
 
 class AlfredService:
@@ -29,16 +35,28 @@ class AlfredService:
         
         # Get fresh API key from environment
         api_key = os.getenv("OPENAI_API_KEY")
-        print(f"🔑 API key from environment: {api_key[:20] if api_key else 'NONE'}...")
         
         if api_key and api_key != "sk-placeholder-users-add-their-own":
             self.client = OpenAI(api_key=api_key)
-            print("✅ OpenAI client created successfully")
+            logger.info("OpenAI client created")
         else:
             self.client = None
-            print("⚠️ No valid API key - OpenAI client not created")
+            logger.warning("No valid OpenAI API key - client not created")
         self.model = "gpt-4o"  # Latest GPT-4 Omni model
         
+    def _create_completion(self, **kwargs):
+        """Chat completion call, recorded in the latency and token metrics"""
+        started = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(model=self.model, **kwargs)
+        finally:
+            openai_request_duration_seconds.observe(time.perf_counter() - started, self.model)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            openai_tokens_total.inc(self.model, "prompt", amount=usage.prompt_tokens or 0)
+            openai_tokens_total.inc(self.model, "completion", amount=usage.completion_tokens or 0)
+        return response
+        
     def get_system_prompt(self, user_name: str, user_role: str, context: Dict[str, Any] = None) -> str:
         """Get system prompt for Alfred with context"""
         context = context or {}
@@ -407,10 +425,12 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
         
         # Get or create conversation
         if conversation_id:
-            session = db.query(AlfredSession).filter(
-                AlfredSession.id == conversation_id,
-                AlfredSession.user_id == user_id
-            ).first()
+            # The previous turn was just written; don't read it from a lagging replica
+            with reading_from_primary(db):
+                session = db.query(AlfredSession).filter(
+                    AlfredSession.id == conversation_id,
+                    AlfredSession.user_id == user_id
+                ).first()
             if session:
                 messages = session.conversation or []
             else:
@@ -472,14 +492,14 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
         function_calls_made = []
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=openai_messages,
-                tools=[{"type": "function", "function": func} for func in self.get_functions_schema()],
-                tool_choice="auto",
-                temperature=0.7,
-                max_tokens=500
-            )
+            with span("llm"):
+                response = self._create_completion(
+                    messages=openai_messages,
+                    tools=[{"type": "function", "function": func} for func in self.get_functions_schema()],
+                    tool_choice="auto",
+                    temperature=0.7,
+                    max_tokens=500
+                )
             
             assistant_message = response.choices[0].message
             
@@ -521,12 +541,12 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                     'content': json.dumps(function_result)
                 })
                 
-                final_response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=openai_messages,
-                    temperature=0.7,
-                    max_tokens=300
-                )
+                with span("llm"):
+                    final_response = self._create_completion(
+                        messages=openai_messages,
+                        temperature=0.7,
+                        max_tokens=300
+                    )
                 
                 response_text = final_response.choices[0].message.content
             else:
@@ -546,10 +566,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
             return response_text, conversation_id, function_calls_made
             
         except Exception as e:
-            import traceback
-            print(f"❌ OpenAI API Error Type: {type(e).__name__}")
-            print(f"❌ OpenAI API Error: {str(e)}")
-            print(f"❌ Traceback:\n{traceback.format_exc()}")
+            logger.exception("OpenAI API error (%s)", type(e).__name__)
             
             # Check if it's an OpenAI-specific error
             error_msg = str(e)
@@ -659,7 +676,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
             }
             
         except Exception as e:
-            print(f"Error creating task: {e}")
+            logger.error("Error creating task: %s", e)
             return {
                 "success": False,
                 "error": f"Failed to create task: {str(e)}"
@@ -777,9 +794,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                     db.commit()
                     
             except Exception as e:
-                print(f"Could not create Google Calendar event: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Could not create Google Calendar event: %s", e)
                 # Continue anyway - meeting is saved in our database
             
             return {
@@ -795,9 +810,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
             }
             
         except Exception as e:
-            print(f"❌ Error scheduling meeting: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error scheduling meeting: %s", e)
             
             # More helpful error message
             error_msg = str(e)
@@ -889,7 +902,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
     async def _add_customer(self, args: Dict[str, Any], user_id: int, db: Session) -> Dict[str, Any]:
         """Add a new customer to Google Sheets"""
         try:
-            from services.sheets_service import sheets_service
+            from services.sheets import sheets_service
             from datetime import datetime
             
             # Prepare customer data
@@ -904,8 +917,18 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                 'notes': f'Added by Alfred on behalf of user {user_id}'
             }
             
-            # Add to Google Sheets
-            success = sheets_service.add_customer(customer_data)
+            # Add to Google Sheets (also folds the row into the running totals)
+            success = await sheets_service.add_customer({
+                'Customer_Name': customer_data['customer_name'],
+                'Status': customer_data['status'],
+                'Start_Date': customer_data['start_date'],
+                'MRR': float(customer_data['mrr'] or 0),
+                'Previous_Month_Revenue': 0,
+                'Plan_Duration': customer_data['plan_duration'],
+                'Setup_Fee': float(customer_data['setup_fee'] or 0),
+                'Industry': customer_data['industry'],
+                'Notes': customer_data['notes']
+            })
             
             if success:
                 return {
@@ -925,7 +948,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                 }
                 
         except Exception as e:
-            print(f"Error adding customer: {e}")
+            logger.error("Error adding customer: %s", e)
             return {
                 "success": False,
                 "error": f"Failed to add customer: {str(e)}"
@@ -934,7 +957,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
     async def _add_expense(self, args: Dict[str, Any], user_id: int, db: Session) -> Dict[str, Any]:
         """Add a business expense to Google Sheets"""
         try:
-            from services.sheets_service import sheets_service
+            from services.sheets import sheets_service
             from datetime import datetime
             from models.user import User
             
@@ -951,8 +974,14 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                 'added_by': user_name
             }
             
-            # Add to Google Sheets
-            success = sheets_service.add_expense(expense_data)
+            # Add to Google Sheets (also folds the row into the running totals)
+            success = await sheets_service.add_expense({
+                'Date': expense_data['date'],
+                'Category': expense_data['category'],
+                'Amount': float(expense_data['amount'] or 0),
+                'Description': expense_data['description'],
+                'Added_By': expense_data['added_by']
+            })
             
             if success:
                 return {
@@ -972,7 +1001,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                 }
                 
         except Exception as e:
-            print(f"Error adding expense: {e}")
+            logger.error("Error adding expense: %s", e)
             return {
                 "success": False,
                 "error": f"Failed to add expense: {str(e)}"
@@ -981,7 +1010,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
     async def _add_project(self, args: Dict[str, Any], user_id: int, db: Session) -> Dict[str, Any]:
         """Add a completed project to Google Sheets for QVC tracking"""
         try:
-            from services.sheets_service import sheets_service
+            from services.sheets import sheets_service
             from datetime import datetime
             
             # Prepare project data
@@ -996,8 +1025,17 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                 'notes': f'Added by Alfred on behalf of user {user_id}'
             }
             
-            # Add to Google Sheets
-            success = sheets_service.add_project(project_data)
+            # Add to Google Sheets (also folds the row into the running totals)
+            success = await sheets_service.add_project({
+                'Client_Name': project_data['client_name'],
+                'Project_Name': project_data['project_name'],
+                'Completion_Date': project_data['completion_date'],
+                'Documentation_Link': project_data['documentation_link'],
+                'Value_Type': project_data['value_type'],
+                'Value_Amount': float(project_data['value_amount'] or 0),
+                'Calculated_By': project_data['calculated_by'],
+                'Notes': project_data['notes']
+            })
             
             if success:
                 return {
@@ -1017,7 +1055,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                 }
                 
         except Exception as e:
-            print(f"Error adding project: {e}")
+            logger.error("Error adding project: %s", e)
             return {
                 "success": False,
                 "error": f"Failed to add project: {str(e)}"
@@ -1026,7 +1064,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
     async def _get_metrics(self, args: Dict[str, Any], user_id: int, db: Session) -> Dict[str, Any]:
         """Get current business metrics"""
         try:
-            from models.business_metric import BusinessMetric, MetricPermission
+            from models.business_metric import LatestMetric
             from models.user import User
             
             metric_type = args.get('metric_type', 'all')
@@ -1035,27 +1073,27 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
             from services.permission_service import PermissionService
             permission_service = PermissionService(db)
 
-            # Check permissions
+            # Check permissions: resolve every metric feature key in one pass
+            metric_types = ['mrr', 'cac', 'ltv', 'qvc', 'ltgp']
+            if metric_type != 'all' and metric_type not in metric_types:
+                metric_types.append(metric_type)
+            granted = permission_service.get_granted_features(
+                [user], [f"metrics.{m_type}.view" for m_type in metric_types]
+            )[user.id]
+
             def has_permission(m_type):
-                if user.role == 'ceo':
-                    return True
-                # Map metric type to feature key
-                feature_key = f"metrics.{m_type}.view"
-                return permission_service.check_permission(user, feature_key)
+                return f"metrics.{m_type}.view" in granted
             
             if metric_type == 'all':
                 # Get all metrics user has access to
                 metrics = {}
-                for m_type in ['mrr', 'cac', 'ltv', 'qvc', 'ltgp']:
-                    if has_permission(m_type):
-                        metric = db.query(BusinessMetric).filter(
-                            BusinessMetric.metric_type == m_type
-                        ).first()
-                        if metric:
-                            metrics[m_type] = {
-                                'current': float(metric.current_value) if metric.current_value else 0,
-                                'change': float(metric.change_percentage) if metric.change_percentage else 0
-                            }
+                permitted = [m_type for m_type in ['mrr', 'cac', 'ltv', 'qvc', 'ltgp'] if has_permission(m_type)]
+                rows = db.query(LatestMetric).filter(LatestMetric.metric_type.in_(permitted)).all() if permitted else []
+                for metric in rows:
+                    metrics[metric.metric_type] = {
+                        'current': float(metric.current_value) if metric.current_value else 0,
+                        'change': float(metric.change_percentage) if metric.change_percentage else 0
+                    }
                 
                 # Format response
                 response = "📊 **Business Metrics Summary**\n\n"
@@ -1093,9 +1131,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                         "error": f"You don't have permission to view {metric_type.upper()} metrics."
                     }
                 
-                metric = db.query(BusinessMetric).filter(
-                    BusinessMetric.metric_type == metric_type
-                ).first()
+                metric = db.get(LatestMetric, metric_type)
                 
                 if not metric:
                     return {
@@ -1138,7 +1174,7 @@ Remember: Be helpful, natural, and human-like. You're Alfred, not a form to fill
                 }
                 
         except Exception as e:
-            print(f"Error getting metrics: {e}")
+            logger.error("Error getting metrics: %s", e)
             return {
                 "success": False,
                 "error": f"Failed to get metrics: {str(e)}"
@@ -1151,7 +1187,6 @@ def get_alfred_service() -> AlfredService:
     """Get or create the Alfred service instance"""
     global _alfred_service_instance
     if _alfred_service_instance is None:
-        print(f"🔧 Initializing Alfred service with API key: {settings.OPENAI_API_KEY[:20] if settings.OPENAI_API_KEY else 'NONE'}...")
         _alfred_service_instance = AlfredService()
-        print(f"✅ Alfred service initialized. Client: {_alfred_service_instance.client is not None}")
+        logger.info("Alfred service initialized (client=%s)", _alfred_service_instance.client is not None)
     return _alfred_service_instance
@@ -0,0 +1,124 @@
+"""
+CAC Channel Attribution
+Maps expenses and new customers to acquisition channels and materializes CACByChannel
+"""
+import calendar
+import re
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.business_metric import CACByChannel
+from services.calculations import MARKETING_CATEGORIES, parse_date
+
+
+# Checked in order, first match wins
+CHANNEL_PATTERNS = [
+    ("paid_search", r"google ads|adwords|bing ads|\bppc\b|\bsem\b|search ads?"),
+    ("paid_social", r"facebook|\bmeta\b|instagram|linkedin|twitter|\bx ads\b|tiktok|social ads?"),
+    ("referral", r"referr|partner|affiliate|word of mouth"),
+    ("events", r"conference|event|trade ?show|meetup|webinar|sponsor"),
+    ("outbound", r"outbound|cold (?:email|call)|\bsdr\b|lead list|apollo|outreach"),
+    ("organic", r"\bseo\b|content|blog|organic|inbound|newsletter"),
+]
+
+# One alternation with a named group per channel, compiled once at import
+CHANNEL_MATCHER = re.compile(
+    "|".join(f"(?P<{channel}>{pattern})" for channel, pattern in CHANNEL_PATTERNS),
+    re.IGNORECASE
+)
+
+SALES_CATEGORIES = {'Sales & Business Development', 'Sales cost'}
+UNATTRIBUTED = "unattributed"
+BLENDED = "all"
+
+
+def match_channel(*texts: Optional[str]) -> Optional[str]:
+    """Return the first channel matched by any of the texts"""
+    for text in texts:
+        if text:
+            match = CHANNEL_MATCHER.search(text)
+            if match:
+                return match.lastgroup
+    return None
+
+
+def _month(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    parsed = parse_date(value) if value else None
+    return (parsed.year, parsed.month) if parsed else None
+
+
+class _ChannelTotals:
+    __slots__ = ("marketing_spend", "sales_spend", "new_customers")
+
+    def __init__(self):
+        self.marketing_spend = 0.0
+        self.sales_spend = 0.0
+        self.new_customers = 0
+
+
+class CACAttributionEngine:
+    """Builds CACByChannel rows for every month present in the Expenses and Customers tabs"""
+
+    def customer_channel(self, customer: Dict) -> str:
+        """Channel from an explicit Channel/Source column, else matched from Notes"""
+        explicit = customer.get('Channel') or customer.get('Source') or customer.get('Lead_Source')
+        if explicit:
+            return match_channel(explicit) or str(explicit).strip().lower().replace(' ', '_')
+        return match_channel(customer.get('Notes')) or UNATTRIBUTED
+
+    def compute(self, customers: List[Dict], expenses: List[Dict]) -> List[Dict]:
+        """Attribute spend and new customers per (month, channel), plus a blended row per month"""
+        totals: Dict[Tuple[Tuple[int, int], str], _ChannelTotals] = defaultdict(_ChannelTotals)
+
+        for e in expenses:
+            category = e.get('Category')
+            if category not in MARKETING_CATEGORIES:
+                continue
+            month = _month(e.get('Date'))
+            if not month:
+                continue
+            amount = e.get('Amount') or 0
+            channel = match_channel(e.get('Description'), category) or UNATTRIBUTED
+            for key in ((month, channel), (month, BLENDED)):
+                if category in SALES_CATEGORIES:
+                    totals[key].sales_spend += amount
+                else:
+                    totals[key].marketing_spend += amount
+
+        for c in customers:
+            month = _month(c.get('Start_Date'))
+            if not month:
+                continue
+            totals[(month, self.customer_channel(c))].new_customers += 1
+            totals[(month, BLENDED)].new_customers += 1
+
+        rows = []
+        for ((year, month), channel), t in sorted(totals.items()):
+            total_spend = t.marketing_spend + t.sales_spend
+            rows.append({
+                "period_start": date(year, month, 1),
+                "period_end": date(year, month, calendar.monthrange(year, month)[1]),
+                "channel": channel,
+                "marketing_spend": round(t.marketing_spend, 2),
+                "sales_spend": round(t.sales_spend, 2),
+                "total_spend": round(total_spend, 2),
+                "new_customers": t.new_customers,
+                "cac": round(total_spend / t.new_customers, 2) if t.new_customers else 0
+            })
+        return rows
+
+    def persist(self, db: Session, rows: List[Dict]) -> int:
+        """Replace all historical periods in one transaction with a single bulk insert"""
+        db.query(CACByChannel).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(CACByChannel), rows)
+        db.commit()
+        return len(rows)
+
+
+# Singleton instance
+cac_attribution_engine = CACAttributionEngine()
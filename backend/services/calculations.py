@@ -5,6 +5,14 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import calendar
 
+from utils.timing import timed
+
+
+# Expense categories that count towards customer acquisition spend
+MARKETING_CATEGORIES = [
+    'Marketing & Advertising', 'Sales & Business Development', 'Marketing', 'Sales cost', 'Advertising'
+]
+
 
 def get_current_month_range():
     """Get start and end date of current month"""
@@ -45,6 +53,7 @@ def parse_date(date_str: str) -> Optional[datetime]:
         return None
 
 
+@timed("compute")
 async def calculate_mrr(customers: List[Dict]) -> Dict:
     """Calculate MRR from active customers"""
     active = [c for c in customers if c.get('Status') == 'Active']
@@ -67,6 +76,7 @@ async def calculate_mrr(customers: List[Dict]) -> Dict:
     }
 
 
+@timed("compute")
 async def calculate_cac(customers: List[Dict], expenses: List[Dict]) -> Dict:
     """Calculate Customer Acquisition Cost"""
     month_start, month_end = get_current_month_range()
@@ -74,7 +84,7 @@ async def calculate_cac(customers: List[Dict], expenses: List[Dict]) -> Dict:
     # Marketing/Sales expenses this month
     marketing_expenses = [
         e for e in expenses
-        if e.get('Category') in ['Marketing & Advertising', 'Sales & Business Development', 'Marketing', 'Sales cost', 'Advertising']
+        if e.get('Category') in MARKETING_CATEGORIES
         and parse_date(e.get('Date'))
         and month_start <= parse_date(e.get('Date')) <= month_end
     ]
@@ -105,6 +115,7 @@ async def calculate_cac(customers: List[Dict], expenses: List[Dict]) -> Dict:
     }
 
 
+@timed("compute")
 async def calculate_ltv(customers: List[Dict]) -> Dict:
     """Calculate Lifetime Value"""
     active = [c for c in customers if c.get('Status') == 'Active' and c.get('MRR', 0) > 0]
@@ -142,6 +153,7 @@ async def calculate_ltv(customers: List[Dict]) -> Dict:
     }
 
 
+@timed("compute")
 async def calculate_qvc(projects: List[Dict]) -> Dict:
     """Calculate Quarterly Value Created"""
     quarter_start, quarter_end = get_current_quarter_range()
@@ -169,6 +181,7 @@ async def calculate_qvc(projects: List[Dict]) -> Dict:
     }
 
 
+@timed("compute")
 async def calculate_ltgp(customers: List[Dict]) -> Dict:
     """Calculate Lifetime Gross Profit"""
     active = [c for c in customers if c.get('Status') == 'Active']
@@ -195,6 +208,7 @@ async def calculate_ltgp(customers: List[Dict]) -> Dict:
     }
 
 
+@timed("compute")
 async def calculate_nrr(customers: List[Dict]) -> float:
     """Calculate Net Revenue Retention"""
     # Existing customers with previous month data
@@ -215,6 +229,7 @@ async def calculate_nrr(customers: List[Dict]) -> float:
     return round(nrr, 2)
 
 
+@timed("compute")
 async def calculate_gross_margin(customers: List[Dict], expenses: List[Dict]) -> float:
     """Calculate Gross Margin"""
     active = [c for c in customers if c.get('Status') == 'Active']
@@ -231,6 +246,7 @@ async def calculate_gross_margin(customers: List[Dict], expenses: List[Dict]) ->
     return round(gross_margin, 2)
 
 
+@timed("compute")
 async def calculate_customer_concentration(customers: List[Dict]) -> float:
     """Calculate Customer Concentration (Top 3)"""
     active = [c for c in customers if c.get('Status') == 'Active']
@@ -0,0 +1,185 @@
+"""
+Customer Cohort Engine
+Builds the cohort x age retention and revenue matrix with numpy array operations
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.business_metric import CustomerCohort
+from services.calculations import parse_date
+
+
+def _month_index(d: datetime) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def _parse_month_index(value) -> Optional[int]:
+    """Month index of a date string; ISO dates are sliced, other formats go through parse_date"""
+    if not value:
+        return None
+    if len(value) >= 7 and value[4] == '-' and value[:4].isdigit() and value[5:7].isdigit():
+        return int(value[:4]) * 12 + int(value[5:7]) - 1
+    parsed = parse_date(value)
+    return _month_index(parsed) if parsed else None
+
+
+def _month_start(index: int) -> date:
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class CohortEngine:
+    """
+    Groups customers by Start_Date month and tracks each cohort as it ages.
+
+    The Customers tab has no churn date, so a customer's lifetime is taken from
+    an explicit Churn_Date/End_Date column when present, runs to today while
+    Active, and otherwise lasts Plan_Duration months (capped at today).
+    Revenue uses MRR while Active and the last billed Previous_Month_Revenue
+    for churned customers.
+    """
+
+    def __init__(self):
+        # Cache for the served matrix
+        self._cache = None
+        self._cache_time = None
+        self._cache_duration = 300  # 5 minutes in seconds
+
+    def compute_matrix(self, customers: List[Dict], as_of: Optional[datetime] = None) -> Dict:
+        """Return cohort months plus customers, revenue and retention as (cohort, age) arrays"""
+        now_idx = _month_index(as_of or datetime.now())
+
+        starts, ends, mrrs = [], [], []
+        for c in customers:
+            start_idx = _parse_month_index(c.get('Start_Date'))
+            if start_idx is None or start_idx > now_idx:
+                continue
+
+            churn_idx = _parse_month_index(c.get('Churn_Date') or c.get('End_Date'))
+            if churn_idx is not None:
+                end_idx = churn_idx
+            elif c.get('Status') == 'Active':
+                end_idx = now_idx + 1
+            else:
+                end_idx = min(start_idx + int(c.get('Plan_Duration') or 12), now_idx + 1)
+
+            starts.append(start_idx)
+            ends.append(max(end_idx, start_idx + 1))
+            if c.get('Status') == 'Active':
+                mrrs.append(c.get('MRR') or 0)
+            else:
+                mrrs.append(c.get('Previous_Month_Revenue') or 0)
+
+        if not starts:
+            empty = np.zeros((0, 0))
+            return {"cohort_months": [], "customers": empty, "revenue": empty, "retention": empty,
+                    "avg_ltv": empty, "observed": empty.astype(bool)}
+
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        mrrs = np.asarray(mrrs, dtype=np.float64)
+
+        first = starts.min()
+        n_cohorts = now_idx - first + 1
+        n_ages = n_cohorts
+        cohort = starts - first
+        lifetime = np.minimum(ends - starts, n_ages)
+
+        # Difference arrays: +1 at age 0, -1 at the age the customer leaves, then
+        # a cumulative sum along the age axis gives customers alive at each age
+        alive = np.zeros((n_cohorts, n_ages + 1))
+        revenue = np.zeros((n_cohorts, n_ages + 1))
+        np.add.at(alive, (cohort, 0), 1)
+        np.add.at(alive, (cohort, lifetime), -1)
+        np.add.at(revenue, (cohort, 0), mrrs)
+        np.add.at(revenue, (cohort, lifetime), -mrrs)
+        alive = alive.cumsum(axis=1)[:, :n_ages]
+        revenue = revenue.cumsum(axis=1)[:, :n_ages]
+
+        # A cohort acquired k months ago has only been observed for ages 0..k
+        ages = np.arange(n_ages)
+        observed = ages[None, :] <= (n_cohorts - 1 - np.arange(n_cohorts))[:, None]
+
+        sizes = alive[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            retention = np.where(sizes[:, None] > 0, alive / sizes[:, None], 0.0)
+            cumulative_ltv = np.where(sizes[:, None] > 0, revenue.cumsum(axis=1) / sizes[:, None], 0.0)
+
+        return {
+            "cohort_months": [_month_start(first + i) for i in range(n_cohorts)],
+            "customers": alive,
+            "revenue": revenue,
+            "retention": retention,
+            "avg_ltv": cumulative_ltv,
+            "observed": observed
+        }
+
+    def to_rows(self, matrix: Dict) -> List[Dict]:
+        """Flatten the observed cells of the matrix into CustomerCohort rows"""
+        rows = []
+        cohort_idx, age_idx = np.nonzero(matrix["observed"] & (matrix["customers"][:, :1] > 0))
+        for c, a in zip(cohort_idx.tolist(), age_idx.tolist()):
+            rows.append({
+                "cohort_month": matrix["cohort_months"][c],
+                "months_since_acquisition": a,
+                "customer_count": int(matrix["customers"][c, a]),
+                "initial_mrr": round(float(matrix["revenue"][c, 0]), 2),
+                "current_mrr": round(float(matrix["revenue"][c, a]), 2),
+                "retention_rate": round(float(matrix["retention"][c, a]) * 100, 2),
+                "avg_ltv": round(float(matrix["avg_ltv"][c, a]), 2),
+                "meta_data": {"cohort_size": int(matrix["customers"][c, 0])}
+            })
+        return rows
+
+    def persist(self, db: Session, rows: List[Dict]) -> int:
+        """Replace the stored cohort matrix in one transaction with a single bulk insert"""
+        db.query(CustomerCohort).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(CustomerCohort), rows)
+        db.commit()
+        self.clear_cache()
+        return len(rows)
+
+    def _cache_valid(self) -> bool:
+        return self._cache is not None and (datetime.now() - self._cache_time).total_seconds() < self._cache_duration
+
+    async def get_matrix(self, db: AsyncSession) -> Dict:
+        """Serve the stored matrix grouped by cohort, cached for five minutes"""
+        if self._cache_valid():
+            return self._cache
+
+        cells = await db.scalars(select(CustomerCohort).order_by(
+            CustomerCohort.cohort_month, CustomerCohort.months_since_acquisition
+        ))
+        return self._store_matrix(cells)
+
+    def _store_matrix(self, cells) -> Dict:
+        cohorts: Dict[date, Dict] = {}
+        for cell in cells:
+            cohort = cohorts.setdefault(cell.cohort_month, {
+                "cohort_month": cell.cohort_month.isoformat(),
+                "customer_count": cell.customer_count,
+                "retention": [],
+                "revenue": [],
+                "avg_ltv": []
+            })
+            cohort["retention"].append(float(cell.retention_rate or 0))
+            cohort["revenue"].append(float(cell.current_mrr or 0))
+            cohort["avg_ltv"].append(float(cell.avg_ltv or 0))
+
+        self._cache = {"cohorts": list(cohorts.values())}
+        self._cache_time = datetime.now()
+        return self._cache
+
+    def clear_cache(self):
+        """Drop the served matrix so the next read goes to the database"""
+        self._cache = None
+        self._cache_time = None
+
+
+# Singleton instance
+cohort_engine = CohortEngine()
@@ -0,0 +1,265 @@
+"""
+Incremental Metrics Aggregator
+Keeps running totals for MRR, CAC and QVC so single-row writes don't trigger a full recompute
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from services.calculations import MARKETING_CATEGORIES, parse_date
+
+logger = logging.getLogger(__name__)
+
+
+def _month_key(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Bucket a date string into (year, month)"""
+    parsed = parse_date(value) if value else None
+    return (parsed.year, parsed.month) if parsed else None
+
+
+def _quarter_key(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Bucket a date string into (year, quarter)"""
+    parsed = parse_date(value) if value else None
+    return (parsed.year, (parsed.month - 1) // 3 + 1) if parsed else None
+
+
+def _summarize(current: float, previous: float) -> Dict:
+    """Build the metric payload shape returned by services.calculations"""
+    change_pct = ((current - previous) / previous * 100) if previous > 0 else 0
+    trend = "up" if change_pct > 0.5 else "down" if change_pct < -0.5 else "neutral"
+    return {
+        "current_value": current,
+        "previous_value": previous,
+        "change_percentage": round(change_pct, 2),
+        "trend": trend
+    }
+
+
+class IncrementalMetricsAggregator:
+    """
+    Running totals over the Customers, Expenses and Projects tabs.
+
+    Row-level changes (insert, update, status change, delete) are applied as
+    deltas in O(1): the old row's contribution is subtracted and the new row's
+    contribution is added. A scheduled reconcile re-reads the sheets, rebuilds
+    the totals from scratch and records any drift it finds.
+    """
+
+    DRIFT_TOLERANCE = 0.01
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self.is_primed = False
+        self.last_reconciled_at: Optional[datetime] = None
+        self.last_drift: Dict[str, float] = {}
+        self.drift_count = 0
+        self.delta_count = 0
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Register a callback fired whenever the served totals may have changed"""
+        self._listeners.append(listener)
+
+    def _notify(self):
+        for listener in self._listeners:
+            listener()
+
+    def _reset(self):
+        self.mrr = 0.0
+        self.previous_mrr = 0.0
+        self.active_customers = 0
+        self.new_customers_by_month: Dict[Tuple[int, int], int] = defaultdict(int)
+        self.marketing_spend_by_month: Dict[Tuple[int, int], float] = defaultdict(float)
+        self.project_value_by_quarter: Dict[Tuple[int, int], float] = defaultdict(float)
+
+    # ============================================
+    # ROW DELTAS
+    # ============================================
+
+    def _apply_customer(self, row: Optional[Dict], sign: int):
+        if not row:
+            return
+        if row.get('Status') == 'Active':
+            self.mrr += sign * (row.get('MRR') or 0)
+            self.previous_mrr += sign * (row.get('Previous_Month_Revenue') or 0)
+            self.active_customers += sign
+        month = _month_key(row.get('Start_Date'))
+        if month:
+            self.new_customers_by_month[month] += sign
+
+    def _apply_expense(self, row: Optional[Dict], sign: int):
+        if not row or row.get('Category') not in MARKETING_CATEGORIES:
+            return
+        month = _month_key(row.get('Date'))
+        if month:
+            self.marketing_spend_by_month[month] += sign * (row.get('Amount') or 0)
+
+    def _apply_project(self, row: Optional[Dict], sign: int):
+        if not row:
+            return
+        quarter = _quarter_key(row.get('Completion_Date'))
+        if quarter:
+            self.project_value_by_quarter[quarter] += sign * (row.get('Value_Amount') or 0)
+
+    def apply_customer_change(self, old: Optional[Dict], new: Optional[Dict]):
+        """Apply a customer insert (old=None), update/status change, or delete (new=None)"""
+        with self._lock:
+            self._apply_customer(old, -1)
+            self._apply_customer(new, 1)
+            self.delta_count += 1
+        self._notify()
+
+    def apply_expense_change(self, old: Optional[Dict], new: Optional[Dict]):
+        """Apply an expense insert, update or delete"""
+        with self._lock:
+            self._apply_expense(old, -1)
+            self._apply_expense(new, 1)
+            self.delta_count += 1
+        self._notify()
+
+    def apply_project_change(self, old: Optional[Dict], new: Optional[Dict]):
+        """Apply a project insert, update or delete"""
+        with self._lock:
+            self._apply_project(old, -1)
+            self._apply_project(new, 1)
+            self.delta_count += 1
+        self._notify()
+
+    # ============================================
+    # FULL RECOMPUTE
+    # ============================================
+
+    def rebuild(self, customers: List[Dict], expenses: List[Dict], projects: List[Dict],
+                since_deltas: Optional[int] = None) -> bool:
+        """
+        Replace the running totals with a full recompute. With `since_deltas`
+        (delta_count read before the rows were fetched) nothing is replaced if
+        a delta landed since, as the rows may predate it; returns whether the
+        totals were rebuilt
+        """
+        before = self.version()
+        with self._lock:
+            if since_deltas is not None and self.delta_count != since_deltas:
+                return False
+            self._reset()
+            for row in customers:
+                self._apply_customer(row, 1)
+            for row in expenses:
+                self._apply_expense(row, 1)
+            for row in projects:
+                self._apply_project(row, 1)
+            self.is_primed = True
+        if self.version() != before:
+            self._notify()
+        return True
+
+    def _totals(self) -> Dict[str, float]:
+        month = (datetime.now().year, datetime.now().month)
+        quarter = (month[0], (month[1] - 1) // 3 + 1)
+        return {
+            "mrr": self.mrr,
+            "previous_mrr": self.previous_mrr,
+            "active_customers": self.active_customers,
+            "new_customers_this_month": self.new_customers_by_month.get(month, 0),
+            "marketing_spend_this_month": self.marketing_spend_by_month.get(month, 0.0),
+            "project_value_this_quarter": self.project_value_by_quarter.get(quarter, 0.0),
+        }
+
+    async def reconcile(self) -> Dict[str, float]:
+        """
+        Re-read all tabs, rebuild the totals and return the drift between the
+        incrementally maintained values and the full recompute
+        """
+        from services.sheets import sheets_service
+
+        # Deltas applied while the sheets are read may be missing from the rows
+        stamp = self.delta_count
+        sheets_service.clear_cache()
+        customers, expenses, projects = await asyncio.gather(
+            sheets_service.get_customers(),
+            sheets_service.get_expenses(),
+            sheets_service.get_projects()
+        )
+
+        # read_range swallows API errors and returns no rows; keep the last good totals
+        if not (customers or expenses or projects):
+            return {}
+
+        before = self._totals() if self.is_primed else None
+        if not self.rebuild(customers, expenses, projects, since_deltas=stamp):
+            logger.info("Reconcile skipped: row changes landed during the sheet read; retrying next pass")
+            return {}
+        after = self._totals()
+
+        drift = {}
+        if before:
+            drift = {
+                key: after[key] - before[key]
+                for key in after
+                if abs(after[key] - before[key]) > self.DRIFT_TOLERANCE
+            }
+        if drift:
+            self.drift_count += 1
+            logger.info("Incremental metrics drift corrected", extra={"drift": drift})
+
+        self.last_drift = drift
+        self.last_reconciled_at = datetime.now()
+        return drift
+
+    async def run_reconciliation_loop(self, interval_seconds: int = 300, initial_delay: float = 0):
+        """Reconcile on a fixed schedule until cancelled (after `initial_delay` if already primed)"""
+        await asyncio.sleep(initial_delay)
+        while True:
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error reconciling incremental metrics: %s", e)
+            await asyncio.sleep(interval_seconds)
+
+    # ============================================
+    # METRIC READS
+    # ============================================
+
+    def mrr_summary(self) -> Dict:
+        """Same shape as calculate_mrr, in O(1)"""
+        return _summarize(self.mrr, self.previous_mrr)
+
+    def cac_summary(self) -> Dict:
+        """Same shape as calculate_cac, in O(1)"""
+        totals = self._totals()
+        new_customers = totals["new_customers_this_month"]
+        current_cac = totals["marketing_spend_this_month"] / new_customers if new_customers > 0 else 0
+        # Previous month CAC (simplified - same placeholder ratio as calculate_cac)
+        return _summarize(current_cac, current_cac * 1.1)
+
+    def qvc_summary(self) -> Dict:
+        """Same shape as calculate_qvc, in O(1)"""
+        current_qvc = self._totals()["project_value_this_quarter"]
+        # Previous quarter (rough estimate, matches calculate_qvc)
+        return _summarize(current_qvc, current_qvc * 0.85)
+
+    def version(self) -> Tuple:
+        """Content version of the served totals, for ETags"""
+        totals = self._totals()
+        return (self.is_primed, tuple(round(totals[k], 2) for k in sorted(totals)))
+
+    def stats(self) -> Dict:
+        """Reconciliation bookkeeping for diagnostics"""
+        return {
+            "is_primed": self.is_primed,
+            "deltas_applied": self.delta_count,
+            "drift_corrections": self.drift_count,
+            "last_drift": self.last_drift,
+            "last_reconciled_at": self.last_reconciled_at.isoformat() if self.last_reconciled_at else None,
+            **self._totals()
+        }
+
+
+# Singleton instance
+incremental_metrics = IncrementalMetricsAggregator()
@@ -0,0 +1,88 @@
+"""
+Metric Dependency Graph
+Resolves sheet tabs and metric calculations concurrently under a per-request time budget
+"""
+import asyncio
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from services.calculations import (
+    calculate_mrr, calculate_cac, calculate_ltv, calculate_nrr,
+    calculate_gross_margin, calculate_customer_concentration
+)
+from services.sheets import sheets_service
+
+
+class DependencyTimeout(Exception):
+    """A request's dependencies did not resolve within its budget"""
+
+
+class DependencyGraph:
+    """
+    Named async nodes with declared inputs.
+
+    `resolve` starts every node needed for the requested targets as its own
+    task; a node runs as soon as its inputs are ready, so independent sheet
+    reads overlap and latency is bounded by the slowest chain rather than the
+    sum of all fetches. Each node runs at most once per resolve.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+
+    def node(self, name: str, fn: Callable, *inputs: str):
+        """Register `fn(*inputs)` (a coroutine function) under `name`"""
+        self._nodes[name] = (fn, inputs)
+
+    async def resolve(self, targets: Iterable[str], timeout: float) -> Dict[str, Any]:
+        """Resolve targets (and everything they depend on); raise DependencyTimeout past `timeout` seconds"""
+        tasks: Dict[str, asyncio.Task] = {}
+
+        def schedule(name: str) -> asyncio.Task:
+            if name not in tasks:
+                fn, inputs = self._nodes[name]
+                upstream = [schedule(dep) for dep in inputs]
+
+                async def run():
+                    values = await asyncio.gather(*upstream)
+                    return await fn(*values)
+
+                tasks[name] = asyncio.ensure_future(run())
+            return tasks[name]
+
+        targets = list(targets)
+        wanted = [schedule(name) for name in targets]
+        try:
+            done, pending = await asyncio.wait(wanted, timeout=timeout, return_when=asyncio.FIRST_EXCEPTION)
+            failed = next((task for task in done if task.exception() is not None), None)
+            if failed is not None:
+                raise failed.exception()
+            if pending:
+                waiting = sorted(name for name, task in tasks.items() if not task.done())
+                raise DependencyTimeout(f"Timed out after {timeout:g}s waiting for: {', '.join(waiting)}")
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+        values = [task.result() for task in wanted]
+        return dict(zip(targets, values))
+
+
+def build_metrics_graph() -> DependencyGraph:
+    """Sheet tabs as leaves, metric calculations as nodes over them"""
+    graph = DependencyGraph()
+    graph.node("customers", sheets_service.get_customers)
+    graph.node("expenses", sheets_service.get_expenses)
+    graph.node("projects", sheets_service.get_projects)
+    graph.node("snapshots", sheets_service.get_monthly_snapshots)
+
+    graph.node("mrr", calculate_mrr, "customers")
+    graph.node("cac", calculate_cac, "customers", "expenses")
+    graph.node("ltv", calculate_ltv, "customers")
+    graph.node("nrr", calculate_nrr, "customers")
+    graph.node("gross_margin", calculate_gross_margin, "customers", "expenses")
+    graph.node("customer_concentration", calculate_customer_concentration, "customers")
+    return graph
+
+
+# Singleton instance
+metrics_graph = build_metrics_graph()
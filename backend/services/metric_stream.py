@@ -0,0 +1,178 @@
+"""
+Metric Stream Broker
+Fans live metric deltas out to Server-Sent Events subscribers
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from services.calculations import (
+    calculate_mrr, calculate_cac, calculate_ltv, calculate_qvc, calculate_ltgp
+)
+from utils.timing import detach
+
+logger = logging.getLogger(__name__)
+
+
+# Metric -> permission needed to receive it
+METRIC_PERMISSIONS = {
+    "mrr": "metrics.mrr.view",
+    "cac": "metrics.cac.view",
+    "ltv": "metrics.ltv.view",
+    "qvc": "metrics.qvc.view",
+    "ltgp": "metrics.ltgp.view",
+}
+
+
+class MetricSubscriber:
+    """One SSE connection; deltas published while it is busy are merged, never queued"""
+
+    def __init__(self, user: Dict):
+        self.user = user
+        self.pending: Dict[str, Dict] = {}
+        self.event = asyncio.Event()
+
+    def visible_metrics(self) -> Set[str]:
+        # Read the live user dict so permission changes apply mid-stream
+        if self.user.get("hierarchy_level") == 1:
+            return set(METRIC_PERMISSIONS)
+        permissions = self.user.get("permissions") or {}
+        return {metric for metric, key in METRIC_PERMISSIONS.items() if permissions.get(key)}
+
+    def offer(self, delta: Dict[str, Dict]):
+        visible = self.visible_metrics()
+        filtered = {metric: value for metric, value in delta.items() if metric in visible}
+        if filtered:
+            self.pending.update(filtered)
+            self.event.set()
+
+    def take(self) -> Dict[str, Dict]:
+        pending, self.pending = self.pending, {}
+        self.event.clear()
+        return pending
+
+
+class MetricStreamBroker:
+    """
+    Recomputes the headline metrics once per upstream change (a Sheets tab
+    refresh or an incremental delta), diffs them against the last published
+    values and hands each subscriber only the changed metrics it may see.
+    """
+
+    DEBOUNCE_SECONDS = 1.0
+    HEARTBEAT_SECONDS = 15
+
+    def __init__(self):
+        self.subscribers: Set[MetricSubscriber] = set()
+        self.snapshot: Dict[str, Dict] = {}
+        self._dirty: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.recompute_count = 0
+
+    def notify_change(self, *_):
+        """Upstream data changed; safe to call from any thread (ignored while idle, see subscribe)"""
+        if self._loop is None or self._dirty is None or not self.subscribers:
+            return
+        self._loop.call_soon_threadsafe(self._dirty.set)
+
+    async def compute(self) -> Dict[str, Dict]:
+        """One upstream computation of every streamed metric"""
+        from services.sheets import sheets_service
+        from services.incremental_metrics import incremental_metrics
+
+        customers = await sheets_service.get_customers()
+        if incremental_metrics.is_primed:
+            mrr = incremental_metrics.mrr_summary()
+            cac = incremental_metrics.cac_summary()
+            qvc = incremental_metrics.qvc_summary()
+        else:
+            mrr = await calculate_mrr(customers)
+            cac = await calculate_cac(customers, await sheets_service.get_expenses())
+            qvc = await calculate_qvc(await sheets_service.get_projects())
+
+        return {
+            "mrr": mrr,
+            "cac": cac,
+            "ltv": await calculate_ltv(customers),
+            "qvc": qvc,
+            "ltgp": await calculate_ltgp(customers),
+        }
+
+    async def publish(self):
+        """Recompute, diff against the last snapshot and fan out the changes"""
+        values = await self.compute()
+        self.recompute_count += 1
+        delta = {
+            metric: {**value, "last_updated": datetime.now().isoformat()}
+            for metric, value in values.items()
+            if self.snapshot.get(metric, {}).get("current_value") != value["current_value"]
+            or self.snapshot.get(metric, {}).get("previous_value") != value["previous_value"]
+        }
+        if not delta:
+            return
+        self.snapshot.update(delta)
+        for subscriber in list(self.subscribers):
+            subscriber.offer(delta)
+
+    async def _run(self):
+        # Outlives the request that started it; never record into that request's timing
+        detach()
+        while True:
+            await self._dirty.wait()
+            # Coalesce bursts (e.g. several tabs refreshed together) into one recompute
+            await asyncio.sleep(self.DEBOUNCE_SECONDS)
+            self._dirty.clear()
+            try:
+                await self.publish()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error publishing metric stream update: %s", e)
+
+    async def subscribe(self, user: Dict) -> MetricSubscriber:
+        """Register a connection and queue the current values as its first event"""
+        if self._worker is None or self._worker.done():
+            self._loop = asyncio.get_running_loop()
+            self._dirty = asyncio.Event()
+            # Fresh context: a copy of the subscribing request's would carry its timing and SQL stats
+            self._worker = asyncio.create_task(self._run(), context=contextvars.Context())
+
+        # Changes aren't tracked while nobody is connected, so the snapshot may be stale
+        if not self.subscribers or not self.snapshot:
+            await self.publish()
+
+        subscriber = MetricSubscriber(user)
+        self.subscribers.add(subscriber)
+        subscriber.offer(self.snapshot)
+        return subscriber
+
+    def unsubscribe(self, subscriber: MetricSubscriber):
+        self.subscribers.discard(subscriber)
+
+    async def events(self, subscriber: MetricSubscriber, is_disconnected):
+        """SSE frames for one subscriber: metric deltas plus heartbeat comments"""
+        yield "retry: 5000\n\n"
+        while not await is_disconnected():
+            try:
+                await asyncio.wait_for(subscriber.event.wait(), timeout=self.HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            delta = subscriber.take()
+            if delta:
+                yield f"event: metrics\ndata: {json.dumps(delta)}\n\n"
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "recomputes": self.recompute_count,
+            "metrics": sorted(self.snapshot)
+        }
+
+
+# Singleton instance
+metric_stream_broker = MetricStreamBroker()
@@ -4,13 +4,15 @@ Business logic for metrics calculation, permission management, and data access
 """
 
 from typing import Dict, List, Optional, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select, insert
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 
 from models.business_metric import (
     BusinessMetric,
+    LatestMetric,
     MetricHistory,
     MetricPermission,
     MetricDataSource,
@@ -23,6 +25,7 @@ from models.business_metric import (
     LTGPInitiative
 )
 from models.user import User
+from database.upsert import bulk_upsert
 from schemas.metrics import (
     MetricPermissionCreate,
     MRRComponentCreate,
@@ -34,6 +37,47 @@ from schemas.metrics import (
     ManualMetricEntry
 )
 
+METRIC_TYPES = ["mrr", "cac", "ltv", "qvc", "ltgp"]
+
+
+def latest_business_metrics(metric_types) -> Any:
+    """Newest business_metrics row per type in one windowed query (ROW_NUMBER over the type/period index)"""
+    ranked = select(
+        BusinessMetric,
+        func.row_number().over(
+            partition_by=BusinessMetric.metric_type,
+            order_by=BusinessMetric.period_end.desc()
+        ).label("rank")
+    ).where(BusinessMetric.metric_type.in_(metric_types)).subquery()
+    newest = aliased(BusinessMetric, ranked)
+    return select(newest).where(ranked.c.rank == 1)
+
+
+def _visible_metric_types(granted: Dict[int, set]) -> Dict[int, List[str]]:
+    return {
+        user_id: [m_type for m_type in METRIC_TYPES if f"metrics.{m_type}.view" in keys]
+        for user_id, keys in granted.items()
+    }
+
+
+def _metric_summary(metric: Optional[LatestMetric]) -> Dict[str, Any]:
+    """Dashboard shape of a latest_metrics (or business_metrics) row; all None when the metric has no data yet"""
+    if metric is None:
+        return {
+            "current_value": None,
+            "previous_value": None,
+            "change_percentage": None,
+            "period_end": None,
+            "metadata": None
+        }
+    return {
+        "current_value": float(metric.current_value) if metric.current_value else None,
+        "previous_value": float(metric.previous_value) if metric.previous_value else None,
+        "change_percentage": float(metric.change_percentage) if metric.change_percentage else None,
+        "period_end": metric.period_end.isoformat() if metric.period_end else None,
+        "meta_data": metric.meta_data
+    }
+
 
 class MetricsService:
     """Service for business metrics calculation and management"""
@@ -194,53 +238,45 @@ class MetricsService:
         
         Returns dict with metric_type as key and metric data as value
         """
-        user = db.query(User).filter(User.id == user_id).first()
-        
-        if not user:
+        return (await self.get_users_metrics(db, [user_id])).get(user_id, {})
+    
+    async def get_users_metrics(
+        self,
+        db: Session,
+        user_ids: List[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        get_user_metrics for a batch of users (digests, notifications): one
+        users query, one permission resolution and one metrics read for the
+        whole batch. Unknown user ids are left out.
+        """
+        users = db.query(User).filter(User.id.in_(user_ids)).all()
+        if not users:
             return {}
         
-        # CEO sees everything
-        if user.role == "ceo":
-            metric_types = ["mrr", "cac", "ltv", "qvc", "ltgp"]
-        else:
-            # Get permitted metrics using PermissionService
-            from services.permission_service import PermissionService
-            permission_service = PermissionService(db)
-            
-            all_metrics = ["mrr", "cac", "ltv", "qvc", "ltgp"]
-            metric_types = []
-            
-            for m_type in all_metrics:
-                feature_key = f"metrics.{m_type}.view"
-                if permission_service.check_permission(user, feature_key):
-                    metric_types.append(m_type)
-        
-        # Fetch metric values
-        result = {}
-        for metric_type in metric_types:
-            metric = db.query(BusinessMetric).filter(
-                BusinessMetric.metric_type == metric_type
-            ).order_by(BusinessMetric.period_end.desc()).first()
-            
-            if metric:
-                result[metric_type] = {
-                    "current_value": float(metric.current_value) if metric.current_value else None,
-                    "previous_value": float(metric.previous_value) if metric.previous_value else None,
-                    "change_percentage": float(metric.change_percentage) if metric.change_percentage else None,
-                    "period_end": metric.period_end.isoformat() if metric.period_end else None,
-                    "meta_data": metric.meta_data
-                }
-            else:
-                # Metric exists but no data yet
-                result[metric_type] = {
-                    "current_value": None,
-                    "previous_value": None,
-                    "change_percentage": None,
-                    "period_end": None,
-                    "metadata": None
-                }
-        
-        return result
+        from services.permission_service import PermissionService
+        granted = PermissionService(db).get_granted_features(users, [f"metrics.{m_type}.view" for m_type in METRIC_TYPES])
+        visible = _visible_metric_types(granted)
+        
+        needed = sorted({m_type for types in visible.values() for m_type in types})
+        latest = self._latest_metrics(db, needed)
+        return {
+            user_id: {m_type: _metric_summary(latest.get(m_type)) for m_type in types}
+            for user_id, types in visible.items()
+        }
+    
+    def _latest_metrics(self, db: Session, metric_types: List[str]) -> Dict[str, Any]:
+        """latest_metrics rows by type; types it doesn't have yet (not backfilled) come from the windowed query"""
+        if not metric_types:
+            return {}
+        latest = {
+            metric.metric_type: metric
+            for metric in db.query(LatestMetric).filter(LatestMetric.metric_type.in_(metric_types))
+        }
+        missing = [m_type for m_type in metric_types if m_type not in latest]
+        if missing:
+            latest.update({metric.metric_type: metric for metric in db.scalars(latest_business_metrics(missing))})
+        return latest
     
     async def get_metric_history(
         self,
@@ -262,17 +298,20 @@ class MetricsService:
         db: Session,
         entry: ManualMetricEntry,
         user_id: int
-    ) -> BusinessMetric:
+    ) -> Dict[str, List[str]]:
         """
         Manually enter a metric value (for initial setup or when no automation)
         
+        Re-entering the value a period already holds leaves the row alone and
+        writes no history (see upsert_metrics).
+        
         Args:
             db: Database session
             entry: Manual entry data
             user_id: User making the entry (must be CEO)
         
         Returns:
-            BusinessMetric: Created or updated metric
+            Dict: upsert_metrics report - whether the metric changed or not
         """
         # Verify user is CEO
         user = db.query(User).filter(User.id == user_id).first()
@@ -292,52 +331,17 @@ class MetricsService:
         if previous_value and previous_value != 0:
             change_pct = ((entry.value - previous_value) / previous_value) * 100
         
-        # Create or update metric
-        metric = db.query(BusinessMetric).filter(
-            BusinessMetric.metric_type == entry.metric_type,
-            BusinessMetric.period_end == entry.period_end
-        ).first()
-        
-        if metric:
-            # Update existing
-            metric.current_value = entry.value
-            metric.previous_value = previous_value
-            metric.change_percentage = change_pct
-            if entry.notes:
-                if not metric.meta_data:
-                    metric.meta_data = {}
-                metric.meta_data["notes"] = entry.notes
-                metric.meta_data["manual_entry"] = True
-        else:
-            # Create new
-            period_start = entry.period_end.replace(day=1)
-            metric = BusinessMetric(
-                metric_type=entry.metric_type,
-                current_value=entry.value,
-                previous_value=previous_value,
-                change_percentage=change_pct,
-                period_start=period_start,
-                period_end=entry.period_end,
-                meta_data={
-                    "manual_entry": True,
-                    "notes": entry.notes if entry.notes else None
-                }
-            )
-            db.add(metric)
-        
-        # Also add to history
-        history = MetricHistory(
-            metric_type=entry.metric_type,
-            value=entry.value,
-            period_start=entry.period_end.replace(day=1),
-            period_end=entry.period_end,
-            meta_data={"manual_entry": True, "notes": entry.notes}
-        )
-        db.add(history)
+        report = self.upsert_metrics(db, [{
+            "metric_type": entry.metric_type,
+            "current_value": entry.value,
+            "previous_value": previous_value,
+            "change_percentage": change_pct,
+            "period_end": entry.period_end,
+            "meta_data": {"manual_entry": True, "notes": entry.notes}
+        }])
         
         db.commit()
-        db.refresh(metric)
-        return metric
+        return report
     
     # ============================================
     # MRR CALCULATION METHODS
@@ -418,38 +422,215 @@ class MetricsService:
         if previous_value and previous_value != 0:
             change_pct = ((current_value - previous_value) / previous_value) * 100
         
-        # Update or create
+        return self.upsert_metrics(db, [{
+            "metric_type": metric_type,
+            "current_value": current_value,
+            "previous_value": previous_value,
+            "change_percentage": change_pct,
+            "period_end": period_end
+        }])
+    
+    def upsert_metrics(self, db: Session, metrics: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        Write a batch of business_metrics rows in one upsert statement, keyed
+        on (metric_type, period_end). Rows whose values didn't change are
+        left untouched and get no history row; history for the changed ones
+        goes in with a single insert, and latest_metrics is refreshed for
+        them. Commit is up to the caller, so everything is one transaction.
+        
+        Each metric needs metric_type, current_value and period_end;
+        previous_value, change_percentage and period_start (defaults to the
+        first of the month) are optional. meta_data is only written when
+        every metric in the batch carries it.
+        
+        Returns the metric types that changed and those that didn't.
+        """
+        if not metrics:
+            return {"changed": [], "unchanged": []}
+        
+        now = datetime.utcnow()
+        with_meta = all("meta_data" in metric for metric in metrics)
+        # One statement can't touch the same row twice; the last value for a period wins
+        metrics = list({(metric["metric_type"], metric["period_end"]): metric for metric in metrics}.values())
+        rows = []
+        for metric in metrics:
+            row = {
+                "metric_type": metric["metric_type"],
+                "current_value": metric["current_value"],
+                "previous_value": metric.get("previous_value"),
+                "change_percentage": metric.get("change_percentage"),
+                "period_start": metric.get("period_start") or metric["period_end"].replace(day=1),
+                "period_end": metric["period_end"],
+                "calculated_at": now,
+                "updated_at": now
+            }
+            if with_meta:
+                row["meta_data"] = metric["meta_data"]
+            rows.append(row)
+        
+        compare = ["current_value", "previous_value", "change_percentage"] + (["meta_data"] if with_meta else [])
+        changed_keys = {
+            (row.metric_type, row.period_end)
+            for row in bulk_upsert(
+                db, BusinessMetric, rows,
+                conflict_columns=["metric_type", "period_end"],
+                compare_columns=compare,
+                returning=["metric_type", "period_end"]
+            )
+        }
+        
+        history = [{
+            "metric_type": row["metric_type"],
+            "value": row["current_value"],
+            "period_start": row["period_start"],
+            "period_end": row["period_end"],
+            "meta_data": row.get("meta_data"),
+            "recorded_at": now
+        } for row in rows if (row["metric_type"], row["period_end"]) in changed_keys]
+        if history:
+            db.execute(insert(MetricHistory), history)
+        
+        changed = sorted({metric_type for metric_type, _ in changed_keys})
+        self.refresh_latest_metrics(db, changed)
+        return {
+            "changed": changed,
+            "unchanged": sorted({row["metric_type"] for row in rows} - set(changed))
+        }
+    
+    def refresh_latest_metrics(self, db: Session, metric_types: List[str]):
+        """refresh_latest_metric for several types: one windowed read and one upsert"""
+        if not metric_types:
+            return
+        rows = [{
+            "metric_type": metric.metric_type,
+            "business_metric_id": metric.id,
+            "current_value": metric.current_value,
+            "previous_value": metric.previous_value,
+            "change_percentage": metric.change_percentage,
+            "period_start": metric.period_start,
+            "period_end": metric.period_end,
+            "meta_data": metric.meta_data,
+            "updated_at": datetime.utcnow()
+        } for metric in db.scalars(latest_business_metrics(metric_types))]
+        bulk_upsert(db, LatestMetric, rows, conflict_columns=["metric_type"])
+    
+    def refresh_latest_metric(self, db: Session, metric_type: str) -> Optional[LatestMetric]:
+        """
+        Copy the newest business_metrics row for `metric_type` into
+        latest_metrics (pending writes are flushed first). Goes through the
+        (metric_type, period_end) index, so it costs one row read.
+        """
+        db.flush()
         metric = db.query(BusinessMetric).filter(
-            BusinessMetric.metric_type == metric_type,
-            BusinessMetric.period_end == period_end
-        ).first()
+            BusinessMetric.metric_type == metric_type
+        ).order_by(BusinessMetric.period_end.desc()).first()
+        latest = db.get(LatestMetric, metric_type)
+        
+        if metric is None:
+            if latest is not None:
+                db.delete(latest)
+            return None
+        
+        if latest is None:
+            latest = LatestMetric(metric_type=metric_type)
+            db.add(latest)
+        latest.business_metric_id = metric.id
+        latest.current_value = metric.current_value
+        latest.previous_value = metric.previous_value
+        latest.change_percentage = metric.change_percentage
+        latest.period_start = metric.period_start
+        latest.period_end = metric.period_end
+        latest.meta_data = metric.meta_data
+        return latest
+
+
+
+class AsyncMetricsService:
+    """Read side of MetricsService for async routes (AsyncSession, awaited queries)"""
+    
+    async def check_metric_permission(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        metric_type: str,
+        permission_type: str = "view"
+    ) -> bool:
+        """Check if user has permission for a metric (see MetricsService.check_metric_permission)"""
+        user = await db.get(User, user_id)
         
-        period_start = period_end.replace(day=1)
+        if not user:
+            return False
         
-        if metric:
-            metric.current_value = current_value
-            metric.previous_value = previous_value
-            metric.change_percentage = change_pct
-        else:
-            metric = BusinessMetric(
-                metric_type=metric_type,
-                current_value=current_value,
-                previous_value=previous_value,
-                change_percentage=change_pct,
-                period_start=period_start,
-                period_end=period_end
-            )
-            db.add(metric)
-        
-        # Add to history
-        history = MetricHistory(
-            metric_type=metric_type,
-            value=current_value,
-            period_start=period_start,
-            period_end=period_end
+        if user.role == "ceo":
+            return True
+        
+        from services.permission_service import AsyncPermissionService
+        return await AsyncPermissionService(db).check_permission(user, f"metrics.{metric_type}.view")
+    
+    async def get_user_permissions(
+        self,
+        db: AsyncSession,
+        user_id: int
+    ) -> List[MetricPermission]:
+        """Get all metric permissions for a user"""
+        return list(await db.scalars(
+            select(MetricPermission).where(MetricPermission.user_id == user_id)
+        ))
+    
+    async def get_user_metrics(
+        self,
+        db: AsyncSession,
+        user_id: int
+    ) -> Dict[str, Any]:
+        """All metrics the user has access to, keyed by metric type"""
+        return (await self.get_users_metrics(db, [user_id])).get(user_id, {})
+    
+    async def get_users_metrics(
+        self,
+        db: AsyncSession,
+        user_ids: List[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """Batch get_user_metrics (see MetricsService.get_users_metrics)"""
+        users = list(await db.scalars(select(User).where(User.id.in_(user_ids))))
+        if not users:
+            return {}
+        
+        from services.permission_service import AsyncPermissionService
+        granted = await AsyncPermissionService(db).get_granted_features(
+            users, [f"metrics.{m_type}.view" for m_type in METRIC_TYPES]
         )
-        db.add(history)
+        visible = _visible_metric_types(granted)
+        
+        needed = sorted({m_type for types in visible.values() for m_type in types})
+        latest = {}
+        if needed:
+            latest = {
+                metric.metric_type: metric
+                for metric in await db.scalars(select(LatestMetric).where(LatestMetric.metric_type.in_(needed)))
+            }
+            missing = [m_type for m_type in needed if m_type not in latest]
+            if missing:
+                latest.update({metric.metric_type: metric for metric in await db.scalars(latest_business_metrics(missing))})
+        return {
+            user_id: {m_type: _metric_summary(latest.get(m_type)) for m_type in types}
+            for user_id, types in visible.items()
+        }
+    
+    async def get_metric_history(
+        self,
+        db: AsyncSession,
+        metric_type: str,
+        limit: int = 12
+    ) -> List[MetricHistory]:
+        """Get historical values for a metric"""
+        return list(await db.scalars(
+            select(MetricHistory)
+            .where(MetricHistory.metric_type == metric_type)
+            .order_by(MetricHistory.period_end.desc())
+            .limit(limit)
+        ))
 
 
 # Create singleton instance
 metrics_service = MetricsService()
+async_metrics_service = AsyncMetricsService()
@@ -0,0 +1,118 @@
+"""
+MRR Waterfall Engine
+Splits MRR movement into new, expansion, contraction and churn by diffing customer snapshots
+"""
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.business_metric import MRRComponent
+from services.calculations import get_current_month_range
+
+
+def _index(rows: List[Dict], mrr_field: str, active_only: bool = True) -> Dict[str, float]:
+    """Hash a snapshot by Customer_Name -> MRR (duplicate names are summed)"""
+    index: Dict[str, float] = {}
+    for row in rows:
+        name = row.get('Customer_Name')
+        if not name:
+            continue
+        value = row.get(mrr_field) or 0
+        if active_only and row.get('Status') != 'Active':
+            value = 0
+        index[name] = index.get(name, 0.0) + value
+    return index
+
+
+class MRRWaterfallEngine:
+    """Builds MRRComponent rows from customer snapshots using hash joins"""
+
+    def waterfall(self, previous: Dict[str, float], current: Dict[str, float]) -> Dict:
+        """
+        Classify every customer's MRR movement between two indexed snapshots
+
+        - new: no MRR before, MRR now
+        - expansion / contraction: MRR both periods, moved up / down
+        - churned: MRR before, none now (including customers missing from `current`)
+        """
+        new_mrr = expansion_mrr = contraction_mrr = churned_mrr = 0.0
+        counts = {"new": 0, "expansion": 0, "contraction": 0, "churned": 0}
+
+        for name, cur in current.items():
+            prev = previous.get(name, 0.0)
+            if prev <= 0:
+                if cur > 0:
+                    new_mrr += cur
+                    counts["new"] += 1
+            elif cur <= 0:
+                churned_mrr += prev
+                counts["churned"] += 1
+            elif cur > prev:
+                expansion_mrr += cur - prev
+                counts["expansion"] += 1
+            elif cur < prev:
+                contraction_mrr += prev - cur
+                counts["contraction"] += 1
+
+        for name, prev in previous.items():
+            if prev > 0 and name not in current:
+                churned_mrr += prev
+                counts["churned"] += 1
+
+        total_mrr = sum(v for v in current.values() if v > 0)
+        customer_count = sum(1 for v in current.values() if v > 0)
+
+        return {
+            "new_mrr": round(new_mrr, 2),
+            "expansion_mrr": round(expansion_mrr, 2),
+            "contraction_mrr": round(contraction_mrr, 2),
+            "churned_mrr": round(churned_mrr, 2),
+            "net_new_mrr": round(new_mrr + expansion_mrr - contraction_mrr - churned_mrr, 2),
+            "total_mrr": round(total_mrr, 2),
+            "customer_count": customer_count,
+            "avg_revenue_per_customer": round(total_mrr / customer_count, 2) if customer_count else None,
+            "movement_counts": counts
+        }
+
+    def from_customers(
+        self,
+        customers: List[Dict],
+        period: Optional[Tuple[date, date]] = None
+    ) -> Dict:
+        """
+        Waterfall for a single Customers tab snapshot: Previous_Month_Revenue is
+        last month's MRR (whatever the status now), MRR counts only while Active
+        """
+        if period is None:
+            start, end = get_current_month_range()
+            period = (start.date(), end.date())
+
+        result = self.waterfall(
+            _index(customers, 'Previous_Month_Revenue', active_only=False),
+            _index(customers, 'MRR')
+        )
+        result["period_start"], result["period_end"] = period
+        return result
+
+    def persist(self, db: Session, periods: List[Dict]) -> int:
+        """Replace MRRComponent rows for the given periods in one bulk insert"""
+        if not periods:
+            return 0
+
+        db.query(MRRComponent).filter(
+            MRRComponent.period_end.in_([p["period_end"] for p in periods])
+        ).delete(synchronize_session=False)
+
+        columns = {c.name for c in MRRComponent.__table__.columns} - {"id", "recorded_at"}
+        db.execute(
+            insert(MRRComponent),
+            [{k: v for k, v in p.items() if k in columns} for p in periods]
+        )
+        db.commit()
+        return len(periods)
+
+
+# Singleton instance
+mrr_waterfall_engine = MRRWaterfallEngine()
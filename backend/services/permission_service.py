@@ -3,10 +3,30 @@ Permission Service
 Handles all logic for user permissions, roles, and feature access.
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select, delete
 from models.user import User
 from models.permission import SystemFeature, UserPermission, RoleDefault, RoleDepartmentDefault
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Set
+
+
+def resolve_grants(users: Iterable[User], feature_keys: List[str], overrides: Dict, role_defaults: Dict) -> Dict[int, Set[str]]:
+    """
+    check_permission's precedence (CEO, user override, role default, else
+    denied) applied to preloaded rows: overrides keyed (user_id, feature_key),
+    role_defaults keyed (role, feature_key). Returns granted keys per user id.
+    """
+    granted = {}
+    for user in users:
+        if user.role == "ceo":
+            granted[user.id] = set(feature_keys)
+            continue
+        granted[user.id] = {
+            key for key in feature_keys
+            if overrides.get((user.id, key), role_defaults.get((user.role, key), False))
+        }
+    return granted
+
 
 class PermissionService:
     
@@ -90,6 +110,30 @@ class PermissionService:
         # 4. Default to False
         return False
 
+    def get_granted_features(self, users: List[User], feature_keys: List[str]) -> Dict[int, Set[str]]:
+        """
+        check_permission for many users and features at once: two queries
+        (overrides, role defaults) however many of either there are.
+        """
+        others = [user for user in users if user.role != "ceo"]
+        overrides, role_defaults = {}, {}
+        if others:
+            overrides = {
+                (p.user_id, p.feature_key): p.is_granted
+                for p in self.db.query(UserPermission).filter(
+                    UserPermission.user_id.in_([user.id for user in others]),
+                    UserPermission.feature_key.in_(feature_keys)
+                )
+            }
+            role_defaults = {
+                (d.role, d.feature_key): d.is_granted
+                for d in self.db.query(RoleDefault).filter(
+                    RoleDefault.role.in_({user.role for user in others}),
+                    RoleDefault.feature_key.in_(feature_keys)
+                )
+            }
+        return resolve_grants(users, feature_keys, overrides, role_defaults)
+
     def set_user_permission(self, user_id: int, feature_key: str, is_granted: bool, granter_id: int):
         """
         Set a specific permission override for a user.
@@ -238,3 +282,131 @@ class PermissionService:
             })
         
         return templates
+
+
+class AsyncPermissionService:
+    """PermissionService for async routes: same rules, awaited queries on an AsyncSession"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_all_features(self) -> List[SystemFeature]:
+        """Return all available system features."""
+        return list(await self.db.scalars(select(SystemFeature)))
+
+    async def get_user_effective_permissions(self, user_id: int) -> Dict[str, bool]:
+        """Same hierarchy as PermissionService.get_user_effective_permissions"""
+        user = await self.db.get(User, user_id)
+        if not user:
+            return {}
+
+        all_features = await self.get_all_features()
+
+        # 1. CEO (Super Admin) has access to everything
+        if user.role == "ceo":
+            return {f.key: True for f in all_features}
+
+        permissions = {f.key: False for f in all_features}
+
+        # 4. Role Defaults
+        role_defaults = await self.db.scalars(select(RoleDefault).where(RoleDefault.role == user.role))
+        for rd in role_defaults:
+            if rd.feature_key in permissions:
+                permissions[rd.feature_key] = rd.is_granted
+
+        # 3. Role + Department Defaults
+        if user.department:
+            role_dept_defaults = await self.db.scalars(select(RoleDepartmentDefault).where(
+                RoleDepartmentDefault.role == user.role, RoleDepartmentDefault.department == user.department
+            ))
+            for rdd in role_dept_defaults:
+                if rdd.feature_key in permissions:
+                    permissions[rdd.feature_key] = rdd.is_granted
+
+        # 2. User Specific Overrides
+        user_overrides = await self.db.scalars(select(UserPermission).where(UserPermission.user_id == user_id))
+        for up in user_overrides:
+            if up.feature_key in permissions:
+                permissions[up.feature_key] = up.is_granted
+
+        return permissions
+
+    async def check_permission(self, user: User, feature_key: str) -> bool:
+        """CEO, then user override, then role default, else False"""
+        if user.role == "ceo":
+            return True
+
+        override = await self.db.scalar(select(UserPermission).where(
+            UserPermission.user_id == user.id, UserPermission.feature_key == feature_key
+        ))
+        if override:
+            return override.is_granted
+
+        role_default = await self.db.scalar(select(RoleDefault).where(
+            RoleDefault.role == user.role, RoleDefault.feature_key == feature_key
+        ))
+        if role_default:
+            return role_default.is_granted
+
+        return False
+
+    async def get_granted_features(self, users: List[User], feature_keys: List[str]) -> Dict[int, Set[str]]:
+        """Batch check_permission (see PermissionService.get_granted_features)"""
+        others = [user for user in users if user.role != "ceo"]
+        overrides, role_defaults = {}, {}
+        if others:
+            overrides = {
+                (p.user_id, p.feature_key): p.is_granted
+                for p in await self.db.scalars(select(UserPermission).where(
+                    UserPermission.user_id.in_([user.id for user in others]),
+                    UserPermission.feature_key.in_(feature_keys)
+                ))
+            }
+            role_defaults = {
+                (d.role, d.feature_key): d.is_granted
+                for d in await self.db.scalars(select(RoleDefault).where(
+                    RoleDefault.role.in_({user.role for user in others}),
+                    RoleDefault.feature_key.in_(feature_keys)
+                ))
+            }
+        return resolve_grants(users, feature_keys, overrides, role_defaults)
+
+    async def set_user_permission(self, user_id: int, feature_key: str, is_granted: bool, granter_id: int):
+        """Set a specific permission override for a user."""
+        permission = await self.db.scalar(select(UserPermission).where(
+            UserPermission.user_id == user_id, UserPermission.feature_key == feature_key
+        ))
+
+        if permission:
+            permission.is_granted = is_granted
+            permission.granted_by = granter_id
+        else:
+            permission = UserPermission(
+                user_id=user_id,
+                feature_key=feature_key,
+                is_granted=is_granted,
+                granted_by=granter_id
+            )
+            self.db.add(permission)
+
+        await self.db.commit()
+        return permission
+
+    async def reset_user_to_defaults(self, user_id: int):
+        """Remove all permission overrides for a user, reverting them to role defaults."""
+        await self.db.execute(delete(UserPermission).where(UserPermission.user_id == user_id))
+        await self.db.commit()
+        return True
+
+    async def get_role_department_default(self, role: str, department: str) -> Dict[str, bool]:
+        """Default permissions for a specific role+department combination."""
+        permissions = {f.key: False for f in await self.get_all_features()}
+
+        defaults = await self.db.scalars(select(RoleDepartmentDefault).where(
+            RoleDepartmentDefault.role == role, RoleDepartmentDefault.department == department
+        ))
+        for default in defaults:
+            if default.feature_key in permissions:
+                permissions[default.feature_key] = default.is_granted
+
+        return permissions
@@ -0,0 +1,102 @@
+"""
+Segment LTV Materialization
+Computes LTV, churn and margin for every customer segment in one group-by pass
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.business_metric import LTVBySegment
+from services.calculations import calculate_gross_margin
+
+
+# The Customers tab has no headcount column, so company size is banded by MRR
+COMPANY_SIZE_BANDS = [
+    (2000, 'smb'),
+    (5000, 'mid_market'),
+    (float('inf'), 'enterprise'),
+]
+
+
+def _company_size(mrr: float) -> str:
+    for upper, label in COMPANY_SIZE_BANDS:
+        if mrr < upper:
+            return label
+    return COMPANY_SIZE_BANDS[-1][1]
+
+
+class _SegmentTotals:
+    __slots__ = ("customers", "churned", "active", "active_mrr", "active_duration")
+
+    def __init__(self):
+        self.customers = 0
+        self.churned = 0
+        self.active = 0
+        self.active_mrr = 0.0
+        self.active_duration = 0
+
+
+class SegmentLTVJob:
+    """Materializes LTVBySegment for the industry, plan_duration and company_size segments"""
+
+    SEGMENT_TYPES = ("industry", "plan_duration", "company_size")
+
+    def _segment_keys(self, customer: Dict) -> Tuple[Tuple[str, str], ...]:
+        revenue = customer.get('MRR') or customer.get('Previous_Month_Revenue') or 0
+        return (
+            ("industry", (customer.get('Industry') or 'Unknown').strip() or 'Unknown'),
+            ("plan_duration", f"{customer.get('Plan_Duration', 12)} months"),
+            ("company_size", _company_size(revenue)),
+        )
+
+    async def compute(self, customers: List[Dict], expenses: List[Dict]) -> List[Dict]:
+        """Aggregate every segment in a single pass over the customers"""
+        totals: Dict[Tuple[str, str], _SegmentTotals] = defaultdict(_SegmentTotals)
+
+        for c in customers:
+            is_active = c.get('Status') == 'Active'
+            mrr = c.get('MRR') or 0
+            for key in self._segment_keys(c):
+                seg = totals[key]
+                seg.customers += 1
+                if is_active and mrr > 0:
+                    seg.active += 1
+                    seg.active_mrr += mrr
+                    seg.active_duration += c.get('Plan_Duration', 12)
+                elif not is_active:
+                    seg.churned += 1
+
+        # Direct delivery costs aren't tagged per customer, so they are spread
+        # pro rata to revenue, which gives every segment the company-wide margin
+        gross_margin = await calculate_gross_margin(customers, expenses)
+
+        rows = []
+        for (segment_type, segment_value), seg in sorted(totals.items()):
+            avg_revenue = seg.active_mrr / seg.active if seg.active else 0
+            avg_lifespan = seg.active_duration / seg.active if seg.active else 0
+            rows.append({
+                "segment_type": segment_type,
+                "segment_value": segment_value,
+                "avg_revenue_per_customer": round(avg_revenue, 2),
+                "avg_customer_lifespan_months": round(avg_lifespan),
+                "churn_rate": round(seg.churned / seg.customers * 100, 2) if seg.customers else 0,
+                "gross_margin": gross_margin,
+                # Same formula as calculate_ltv: average MRR x average plan duration
+                "calculated_ltv": round(avg_revenue * avg_lifespan, 2),
+                "customer_count": seg.customers
+            })
+        return rows
+
+    def persist(self, db: Session, rows: List[Dict]) -> int:
+        """Replace the materialized segments in one transaction with a single bulk insert"""
+        db.query(LTVBySegment).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(LTVBySegment), rows)
+        db.commit()
+        return len(rows)
+
+
+# Singleton instance
+segment_ltv_job = SegmentLTVJob()
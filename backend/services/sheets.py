@@ -4,56 +4,152 @@ Follows the reference pattern from google_service.py
 """
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+import google_auth_httplib2
+import httplib2
 from typing import List, Dict, Optional
 from datetime import datetime
+import asyncio
+import logging
+import threading
 import os
 from dotenv import load_dotenv
 
+from utils.http_cache import fingerprint
+from utils.timing import span, count, annotate, current
+from utils.metrics_registry import sheets_cache_requests_total, sheets_refreshes_total
+from services.incremental_metrics import incremental_metrics
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class GoogleSheetsService:
     """Service for Google Sheets integration"""
     
+    # Column order of the tabs rows are appended to (see sheet_setup_guide.md)
+    CUSTOMER_COLUMNS = ['Customer_Name', 'Status', 'Start_Date', 'MRR', 'Previous_Month_Revenue',
+                        'Plan_Duration', 'Setup_Fee', 'Industry', 'Notes']
+    EXPENSE_COLUMNS = ['Date', 'Category', 'Amount', 'Description', 'Added_By']
+    PROJECT_COLUMNS = ['Client_Name', 'Project_Name', 'Completion_Date', 'Documentation_Link',
+                       'Value_Type', 'Value_Amount', 'Calculated_By', 'Notes']
+    
     def __init__(self):
-        # Load credentials from file path
-        credentials_path = os.getenv('GOOGLE_SHEETS_CREDENTIALS_PATH', 'credentials/google-sheets-credentials.json')
-        
-        self.credentials = service_account.Credentials.from_service_account_file(
-            credentials_path,
-            scopes=['https://www.googleapis.com/auth/spreadsheets.readonly']
-        )
-        
-        self.service = build('sheets', 'v4', credentials=self.credentials)
+        # Credentials and the API client are built by initialize(), not on import
+        self.credentials = None
+        self.service = None
         self.spreadsheet_id = os.getenv('GOOGLE_SHEETS_ID')
+        self._init_lock = threading.Lock()
+        
+        # httplib2 isn't thread-safe: each worker thread gets its own authorized connection
+        self._thread_local = threading.local()
+        # Range reads currently in flight, shared by concurrent callers
+        self._inflight = {}
         
         # Cache
         self._cache = {}
         self._cache_time = {}
         self._cache_duration = 300  # 5 minutes in seconds
+        
+        # Content hash of the raw rows last read per tab, used for ETags
+        self._versions = {}
+        # Called with the tab name whenever a re-read finds changed content
+        self._refresh_listeners = []
+    
+    def initialize(self):
+        """Load credentials and build the API client (blocking; idempotent)"""
+        with self._init_lock:
+            if self.service is not None:
+                return
+            credentials_path = os.getenv('GOOGLE_SHEETS_CREDENTIALS_PATH', 'credentials/google-sheets-credentials.json')
+            
+            self.credentials = service_account.Credentials.from_service_account_file(
+                credentials_path,
+                scopes=['https://www.googleapis.com/auth/spreadsheets']
+            )
+            
+            self.service = build('sheets', 'v4', credentials=self.credentials)
+    
+    def _thread_http(self) -> google_auth_httplib2.AuthorizedHttp:
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._thread_local.http = http
+        return http
     
-    async def read_range(self, range_name: str) -> List[List]:
+    def _execute_read(self, range_name: str) -> Dict:
+        """Blocking API call; runs in a worker thread"""
+        if self.service is None:
+            self.initialize()
+        return self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=range_name
+        ).execute(http=self._thread_http())
+    
+    def _finish_read(self, range_name: str, task: asyncio.Future):
+        self._inflight.pop(range_name, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here so an abandoned read doesn't log "never retrieved"
+    
+    async def read_range(self, range_name: str) -> Optional[List[List]]:
         """
-        Read data from a Google Sheet range
+        Read data from a Google Sheet range (None if the API call failed).
+        The API call runs off the event loop so reads of different tabs overlap,
+        and concurrent reads of the same range share one request.
         """
+        count("sheets_calls")
+        timing = current()
+        if timing is not None:
+            timing.notes.setdefault("sheets_ranges", []).append(range_name)
+        
+        task = self._inflight.get(range_name)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(self._execute_read, range_name))
+            self._inflight[range_name] = task
+            task.add_done_callback(lambda t: self._finish_read(range_name, t))
+        
         try:
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name
-            ).execute()
-            
+            # Shielded: a caller timing out must not cancel the read for the others
+            with span("sheets_fetch"):
+                result = await asyncio.shield(task)
             return result.get('values', [])
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"Error reading from Google Sheets: {e}")
-            return []
+            logger.error("Error reading from Google Sheets: %s", e)
+            return None
+    
+    def _set_version(self, key: str, values: List[List]):
+        """Record the tab's content hash and notify listeners if it changed"""
+        version = fingerprint(values)
+        previous = self._versions.get(key)
+        self._versions[key] = version
+        if previous is not None and previous != version:
+            sheets_refreshes_total.inc(key)
+            for listener in self._refresh_listeners:
+                listener(key)
+    
+    def add_refresh_listener(self, listener):
+        """Register a callback(tab) fired when a tab's content changes"""
+        self._refresh_listeners.append(listener)
     
     def _is_cache_valid(self, key: str) -> bool:
-        """Check if cached data is still valid"""
+        """Check if cached data is still valid (counted as a cache hit or miss)"""
         if key not in self._cache or key not in self._cache_time:
+            sheets_cache_requests_total.inc(key, "miss")
+            annotate("sheets_cache", "miss", item=key)
             return False
         
         elapsed = (datetime.now() - self._cache_time[key]).total_seconds()
-        return elapsed < self._cache_duration
+        valid = elapsed < self._cache_duration
+        sheets_cache_requests_total.inc(key, "hit" if valid else "miss")
+        annotate("sheets_cache", f"hit ({elapsed:.0f}s old)" if valid else "expired", item=key)
+        return valid
+    
+    def cache_ages(self) -> Dict[str, float]:
+        """Seconds since each cached tab was read"""
+        now = datetime.now()
+        return {key: (now - cached_at).total_seconds() for key, cached_at in list(self._cache_time.items())}
     
     async def get_customers(self) -> List[Dict]:
         """Get all customers data"""
@@ -63,6 +159,15 @@ class GoogleSheetsService:
             return self._cache[cache_key]
         
         values = await self.read_range('Customers!A:I')  # A to I covers all columns
+        if values is None:
+            # Failed read: nothing cached and the tab's version stays as it was
+            return []
+        with span("parse"):
+            return self._parse_customers(cache_key, values)
+    
+    def _parse_customers(self, cache_key: str, values: List[List]) -> List[Dict]:
+        """Convert the Customers rows (header row first) and cache them"""
+        self._set_version(cache_key, values)
         if not values:
             return []
         
@@ -130,6 +235,14 @@ class GoogleSheetsService:
             return self._cache[cache_key]
         
         values = await self.read_range('Expenses!A:E')
+        if values is None:
+            return []
+        with span("parse"):
+            return self._parse_expenses(cache_key, values)
+    
+    def _parse_expenses(self, cache_key: str, values: List[List]) -> List[Dict]:
+        """Convert the Expenses rows (header row first) and cache them"""
+        self._set_version(cache_key, values)
         if not values:
             return []
         
@@ -164,6 +277,14 @@ class GoogleSheetsService:
             return self._cache[cache_key]
         
         values = await self.read_range('Projects!A:I')  # A to I covers all columns
+        if values is None:
+            return []
+        with span("parse"):
+            return self._parse_projects(cache_key, values)
+    
+    def _parse_projects(self, cache_key: str, values: List[List]) -> List[Dict]:
+        """Convert the Projects rows (header row first) and cache them"""
+        self._set_version(cache_key, values)
         if not values:
             return []
         
@@ -198,6 +319,14 @@ class GoogleSheetsService:
             return self._cache[cache_key]
         
         values = await self.read_range('Monthly_Snapshots!A:H')
+        if values is None:
+            return []
+        with span("parse"):
+            return self._parse_snapshots(cache_key, values)
+    
+    def _parse_snapshots(self, cache_key: str, values: List[List]) -> List[Dict]:
+        """Convert the Monthly_Snapshots rows (header row first) and cache them"""
+        self._set_version(cache_key, values)
         if not values:
             return []
         
@@ -226,6 +355,66 @@ class GoogleSheetsService:
         
         return snapshots
     
+    def _execute_append(self, range_name: str, values: List[List]):
+        """Blocking API call; runs in a worker thread"""
+        if self.service is None:
+            self.initialize()
+        self.service.spreadsheets().values().append(
+            spreadsheetId=self.spreadsheet_id,
+            range=range_name,
+            valueInputOption='USER_ENTERED',
+            body={'values': values}
+        ).execute(http=self._thread_http())
+    
+    async def _append_row(self, tab: str, cache_key: str, columns: List[str], row: Dict) -> bool:
+        """Append `row` (keyed by column header) to `tab`; False if the API call failed"""
+        last_column = chr(ord('A') + len(columns) - 1)
+        try:
+            await asyncio.to_thread(
+                self._execute_append, f'{tab}!A:{last_column}', [[row.get(column, '') for column in columns]]
+            )
+        except Exception as e:
+            logger.error("Error appending to %s: %s", tab, e)
+            return False
+        # The cached rows no longer match the tab
+        self._cache_time.pop(cache_key, None)
+        return True
+    
+    async def add_customer(self, row: Dict) -> bool:
+        """Append a customer row and fold it into the running totals"""
+        if not await self._append_row('Customers', 'customers', self.CUSTOMER_COLUMNS, row):
+            return False
+        incremental_metrics.apply_customer_change(None, row)
+        return True
+    
+    async def add_expense(self, row: Dict) -> bool:
+        """Append an expense row and fold it into the running totals"""
+        if not await self._append_row('Expenses', 'expenses', self.EXPENSE_COLUMNS, row):
+            return False
+        incremental_metrics.apply_expense_change(None, row)
+        return True
+    
+    async def add_project(self, row: Dict) -> bool:
+        """Append a project row and fold it into the running totals"""
+        if not await self._append_row('Projects', 'projects', self.PROJECT_COLUMNS, row):
+            return False
+        incremental_metrics.apply_project_change(None, row)
+        return True
+    
+    async def get_version(self, tab: str) -> str:
+        """
+        Content version of a tab ('customers', 'expenses', 'projects', 'snapshots').
+        Goes through the cached getter, so it only hits the API once the cache expires.
+        """
+        getters = {
+            'customers': self.get_customers,
+            'expenses': self.get_expenses,
+            'projects': self.get_projects,
+            'snapshots': self.get_monthly_snapshots,
+        }
+        await getters[tab]()
+        return self._versions.get(tab, '')
+    
     def clear_cache(self):
         """Clear all cached data"""
         self._cache = {}
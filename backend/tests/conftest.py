@@ -0,0 +1,34 @@
+"""
+Test setup: a throwaway SQLite database and the backend directory on sys.path,
+both in place before any application module reads its settings.
+
+Run from backend/: pip install -r requirements-dev.txt && python -m pytest
+"""
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="synops-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ["DATABASE_REPLICA_URL"] = ""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Session on a freshly created schema, dropped again after the test"""
+    pytest.importorskip("sqlalchemy")
+    from database.connection import Base, SessionLocal, engine
+    import models.user, models.permission, models.business_metric, models.alfred_session, models.api_key  # noqa: F401 - register every table on Base
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,57 @@
+"""Rows appended through the Sheets service move the running totals without a rebuild"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from services.incremental_metrics import incremental_metrics  # noqa: E402
+from services.sheets import sheets_service  # noqa: E402
+
+
+@pytest.fixture
+def appended(monkeypatch):
+    rows = []
+    monkeypatch.setattr(sheets_service, "_execute_append", lambda range_name, values: rows.append((range_name, values)))
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("rebuild must not run on a single-row append")
+
+    monkeypatch.setattr(incremental_metrics, "rebuild", no_rebuild)
+    return rows
+
+
+def test_add_customer_updates_totals(appended):
+    mrr, active = incremental_metrics.mrr, incremental_metrics.active_customers
+
+    assert asyncio.run(sheets_service.add_customer({
+        "Customer_Name": "Delta Co", "Status": "Active", "Start_Date": "2024-05-01",
+        "MRR": 1200.0, "Previous_Month_Revenue": 0
+    }))
+
+    assert incremental_metrics.mrr == mrr + 1200.0
+    assert incremental_metrics.active_customers == active + 1
+    assert appended[0][0] == "Customers!A:I"
+    assert appended[0][1][0][:4] == ["Delta Co", "Active", "2024-05-01", 1200.0]
+
+
+def test_add_expense_and_project_update_totals(appended):
+    deltas = incremental_metrics.delta_count
+
+    assert asyncio.run(sheets_service.add_expense({"Date": "2024-05-02", "Category": "Marketing", "Amount": 300.0}))
+    assert asyncio.run(sheets_service.add_project({"Completion_Date": "2024-05-03", "Value_Amount": 5000.0}))
+
+    assert incremental_metrics.marketing_spend_by_month[(2024, 5)] >= 300.0
+    assert incremental_metrics.project_value_by_quarter[(2024, 2)] >= 5000.0
+    assert incremental_metrics.delta_count == deltas + 2
+
+
+def test_failed_append_leaves_totals_alone(monkeypatch):
+    def fail(range_name, values):
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(sheets_service, "_execute_append", fail)
+    mrr = incremental_metrics.mrr
+
+    assert not asyncio.run(sheets_service.add_customer({"Status": "Active", "MRR": 99.0}))
+    assert incremental_metrics.mrr == mrr
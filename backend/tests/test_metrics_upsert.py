@@ -0,0 +1,50 @@
+"""upsert_metrics and manual_entry only write history for values that actually changed (user-050)"""
+import asyncio
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+
+def history_count(db, metric_type: str) -> int:
+    from models.business_metric import MetricHistory
+
+    return db.query(MetricHistory).filter(MetricHistory.metric_type == metric_type).count()
+
+
+def test_upserting_unchanged_values_writes_no_history(db):
+    from services.metrics_service import metrics_service
+
+    batch = [
+        {"metric_type": "mrr", "current_value": Decimal("1000"), "period_end": date(2024, 5, 31)},
+        {"metric_type": "cac", "current_value": Decimal("250"), "period_end": date(2024, 5, 31)},
+    ]
+    assert metrics_service.upsert_metrics(db, batch) == {"changed": ["cac", "mrr"], "unchanged": []}
+    db.commit()
+
+    batch[0] = {**batch[0], "current_value": Decimal("1100")}
+    assert metrics_service.upsert_metrics(db, batch) == {"changed": ["mrr"], "unchanged": ["cac"]}
+    db.commit()
+
+    assert history_count(db, "mrr") == 2
+    assert history_count(db, "cac") == 1
+
+
+def test_manual_entry_of_the_same_value_is_reported_unchanged(db):
+    from models.business_metric import BusinessMetric
+    from models.user import User
+    from schemas.metrics import ManualMetricEntry
+    from services.metrics_service import metrics_service
+
+    db.add(User(id=1, email="ceo@example.com", password_hash="x", role="ceo"))
+    db.commit()
+    entry = ManualMetricEntry(metric_type="ltv", value=Decimal("5000"), period_end=date(2024, 5, 31), notes="Q2 close")
+
+    assert asyncio.run(metrics_service.manual_entry(db, entry, 1)) == {"changed": ["ltv"], "unchanged": []}
+    assert asyncio.run(metrics_service.manual_entry(db, entry, 1)) == {"changed": [], "unchanged": ["ltv"]}
+
+    assert history_count(db, "ltv") == 1
+    metric = db.query(BusinessMetric).filter(BusinessMetric.metric_type == "ltv").one()
+    assert metric.meta_data == {"manual_entry": True, "notes": "Q2 close"}
@@ -0,0 +1,27 @@
+"""Pool gauges and checkout counts are reported per engine (user-043)"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from utils.metrics_registry import instrument_pool, metrics_registry  # noqa: E402
+
+
+def test_each_instrumented_engine_gets_its_own_series(tmp_path):
+    first = create_engine(f"sqlite:///{tmp_path / 'first.db'}")
+    second = create_engine(f"sqlite:///{tmp_path / 'second.db'}")
+    instrument_pool(first, "test_first")
+    instrument_pool(second, "test_second")
+
+    with first.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        rendered = metrics_registry.render()
+    with second.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    assert 'db_pool_checked_out{engine="test_first"} 1' in rendered
+    assert 'db_pool_checked_out{engine="test_second"} 0' in rendered
+    rendered = metrics_registry.render()
+    assert 'db_pool_checkouts_total{engine="test_first"} 1' in rendered
+    assert 'db_pool_checkouts_total{engine="test_second"} 1' in rendered
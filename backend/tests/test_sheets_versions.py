@@ -0,0 +1,30 @@
+"""A failed Sheets read leaves the tab version alone and fires no refresh listeners (user-036)"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from services.sheets import GoogleSheetsService  # noqa: E402
+
+ROWS = [["Date", "Category", "Amount"], ["2024-05-01", "Marketing", "500"]]
+
+
+def test_failed_read_keeps_version_and_listeners_quiet(monkeypatch):
+    service = GoogleSheetsService()
+    refreshed = []
+    service.add_refresh_listener(refreshed.append)
+
+    monkeypatch.setattr(service, "_execute_read", lambda range_name: {"values": ROWS})
+    assert asyncio.run(service.get_expenses())[0]["Amount"] == 500.0
+    version = asyncio.run(service.get_version("expenses"))
+
+    def unavailable(range_name):
+        raise ConnectionError("Sheets API unavailable")
+
+    monkeypatch.setattr(service, "_execute_read", unavailable)
+    service.clear_cache()
+    assert asyncio.run(service.get_expenses()) == []
+
+    assert asyncio.run(service.get_version("expenses")) == version
+    assert refreshed == []
@@ -0,0 +1,104 @@
+"""
+Response Compression
+Pure ASGI gzip/brotli middleware for complete JSON bodies above a size threshold
+"""
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CompressionMiddleware:
+    """
+    Compresses single-message responses at or above `minimum_size` bytes.
+
+    Brotli is used when the client accepts it and the optional `brotli`
+    package is installed, gzip otherwise. Streaming bodies (including the
+    text/event-stream metric stream), already-encoded responses and bodies
+    below the threshold pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = self._choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"")
+                if b"content-encoding" in headers or content_type.startswith(b"text/event-stream"):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start message until the body shows whether it's worth compressing
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if start_message is None:
+                await send(message)
+                return
+
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streamed or small: send as-is
+                await send(start_message)
+                start_message = None
+                passthrough = True
+                await send(message)
+                return
+
+            compressed = self._compress(body, encoding)
+            vary = b"Accept-Encoding"
+            headers = []
+            for k, v in start_message.get("headers", []):
+                if k.lower() == b"vary":
+                    vary = v + b", Accept-Encoding"
+                elif k.lower() != b"content-length":
+                    headers.append((k, v))
+            headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(compressed)).encode("latin-1")),
+                (b"vary", vary),
+            ]
+            await send({**start_message, "headers": headers})
+            start_message = None
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
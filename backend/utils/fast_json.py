@@ -0,0 +1,46 @@
+"""
+Fast JSON Serialization
+orjson-backed responses (stdlib fallback) that encode datetimes and Decimals natively
+"""
+import datetime
+import decimal
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from utils.timing import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _default(obj: Any):
+    """Types orjson (or json) can't encode on their own"""
+    if isinstance(obj, decimal.Decimal):
+        # Same rule as FastAPI's jsonable_encoder: integral -> int, otherwise float
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; pass plain or pre-validated content"""
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return dumps(content)
@@ -0,0 +1,77 @@
+"""
+Conditional GET helpers
+Content-version ETags so unchanged reads are answered with 304 before any calculation runs
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+
+
+def fingerprint(value: Any) -> str:
+    """Stable short hash of any JSON-serializable value"""
+    payload = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+def permission_fingerprint(user: Dict) -> str:
+    """Hash of what the caller may see: hierarchy level plus the set of granted permissions"""
+    granted = sorted(k for k, v in (user.get("permissions") or {}).items() if v)
+    return fingerprint([user.get("hierarchy_level"), granted])
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over the content version parts (the body itself is never hashed)"""
+    return f'W/"{fingerprint(parts)}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison against an If-None-Match header value"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ConditionalGetStats:
+    """304 hit/miss counters per route"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, int]] = {}
+
+    def record(self, route: str, hit: bool):
+        with self._lock:
+            counts = self._routes.setdefault(route, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            routes = {route: dict(counts) for route, counts in self._routes.items()}
+        hits = sum(c["hits"] for c in routes.values())
+        total = hits + sum(c["misses"] for c in routes.values())
+        for counts in routes.values():
+            requests = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = round(counts["hits"] / requests * 100, 2) if requests else 0
+        return {
+            "hits": hits,
+            "misses": total - hits,
+            "hit_rate": round(hits / total * 100, 2) if total else 0,
+            "routes": routes
+        }
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+
+# Singleton instance
+conditional_get_stats = ConditionalGetStats()
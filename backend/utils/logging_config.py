@@ -0,0 +1,146 @@
+"""
+Logging Configuration
+Non-blocking structured logging: records go through a queue to a background writer that emits JSON lines
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is emitted as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+# Secrets that must never reach the log stream, whatever a caller passes in
+_SECRET_PATTERNS = re.compile(r"(sk-[A-Za-z0-9_\-]{6,}|mock_access_token_\S+|Bearer\s+\S+)")
+
+
+def redact(text: str) -> str:
+    return _SECRET_PATTERNS.sub("[REDACTED]", text)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, extra fields and exception text"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = redact(record.exc_text)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redact(super().format(record))
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through at most `burst` records per message template (logger, level,
+    unformatted msg) in each `window` seconds. The first record after a
+    window with drops carries `suppressed`, the number dropped.
+    """
+
+    def __init__(self, burst: int = 10, window: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._lock = threading.Lock()
+        # template -> [window start, emitted, suppressed]
+        self._state: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._state[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread with args merged and tracebacks rendered, but not yet formatted"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """'services.sheets=DEBUG,uvicorn.access=WARNING' -> {logger: level}"""
+    levels = {}
+    for part in spec.split(","):
+        name, _, level = part.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: str = "INFO", module_levels: str = "", fmt: str = "json",
+                      sample_burst: int = 10, sample_window: float = 60.0):
+    """Route the root logger through a queue to a background stdout writer (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+
+    queue_handler = _QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SamplingFilter(sample_burst, sample_window))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level.upper())
+    for name, module_level in parse_levels(module_levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
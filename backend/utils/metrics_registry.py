@@ -0,0 +1,261 @@
+"""
+Operational Metrics Registry
+Per-thread sharded counters and histograms rendered in the Prometheus text exposition format
+"""
+import bisect
+import logging
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; shared by request and upstream latency histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Sharded:
+    """
+    Per-thread value dicts. The owning thread updates its shard without a
+    lock; a scrape copies every shard (dict.copy is atomic under the GIL) and
+    merges them. A lock is only taken the first time a thread records.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _copies(self) -> List[Dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    """Monotonic counter; `inc(*labelvalues)`"""
+
+    type = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def collect(self) -> List[str]:
+        totals: Dict[Labels, float] = {}
+        for shard in self._copies():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(totals.items())
+        ]
+
+
+class Histogram(_Sharded):
+    """Cumulative-bucket histogram; `observe(value, *labelvalues)`"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labelvalues: str):
+        shard = self._shard()
+        series = shard.get(labelvalues)
+        if series is None:
+            # Per-bucket counts (last is +Inf), then sum
+            series = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> List[str]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._copies():
+            for labels, series in shard.items():
+                merged = totals.setdefault(labels, [0] * len(series))
+                for i, value in enumerate(list(series)):
+                    merged[i] += value
+
+        lines = []
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for labels, series in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class GaugeFunc:
+    """Gauge read at scrape time; `fn()` returns a number or {labelvalues tuple: number}"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, fn: Callable, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def collect(self) -> List[str]:
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them for a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, fn: Callable, labelnames: Iterable[str] = ()) -> GaugeFunc:
+        return self._register(GaugeFunc(name, documentation, fn, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = metric.collect()
+            except Exception as e:
+                # A broken gauge callback must not take the whole scrape down
+                samples = []
+                logger.error("Error collecting metric %s: %s", metric.name, e)
+            help_text = metric.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+            lines.append(f"# HELP {metric.name} {help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance
+metrics_registry = MetricsRegistry()
+
+# ============================================
+# SHARED METRICS
+# ============================================
+
+http_requests_total = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by method, route template and status", ("method", "route", "status")
+)
+http_request_duration_seconds = metrics_registry.histogram(
+    "http_request_duration_seconds", "Time to response start by method and route template", ("method", "route")
+)
+sheets_cache_requests_total = metrics_registry.counter(
+    "sheets_cache_requests_total", "Sheets tab reads served from cache (hit) or the API (miss)", ("tab", "result")
+)
+sheets_refreshes_total = metrics_registry.counter(
+    "sheets_refreshes_total", "Re-reads that found changed tab content", ("tab",)
+)
+openai_request_duration_seconds = metrics_registry.histogram(
+    "openai_request_duration_seconds", "OpenAI chat completion latency", ("model",)
+)
+openai_tokens_total = metrics_registry.counter(
+    "openai_tokens_total", "OpenAI tokens used", ("model", "type")
+)
+db_pool_checkouts_total = metrics_registry.counter(
+    "db_pool_checkouts_total", "Connections checked out of the SQLAlchemy pool", ("engine",)
+)
+db_pool_checkout_wait_seconds = metrics_registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time a checkout waited for a pooled connection (including connects)", ("engine",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 10.0)
+)
+db_session_leaks_total = metrics_registry.counter(
+    "db_session_leaks_total", "Sessions still holding a connection after their request responded", ("method", "route")
+)
+
+
+def observe_request(method: str, route: str, status: int, total_ms: float):
+    """TimingMiddleware observer feeding the request counter and latency histogram"""
+    http_requests_total.inc(method, route, str(status))
+    http_request_duration_seconds.observe(total_ms / 1000, method, route)
+
+
+# Engines passed to instrument_pool, by their `engine` label
+_pooled_engines: Dict[str, object] = {}
+
+
+def _pool_gauge(method: str) -> Callable:
+    """Gauge callback reading `method` off every instrumented engine's current pool"""
+    def read():
+        values = {}
+        for name, engine in list(_pooled_engines.items()):
+            pool = engine.pool  # looked up per scrape: dispose() swaps the pool out
+            values[(name,)] = getattr(pool, method)() if hasattr(pool, method) else 0
+        return values
+    return read
+
+
+metrics_registry.gauge("db_pool_checked_out", "Connections currently checked out", _pool_gauge("checkedout"), ("engine",))
+metrics_registry.gauge("db_pool_checked_in", "Idle connections held by the pool", _pool_gauge("checkedin"), ("engine",))
+metrics_registry.gauge(
+    "db_pool_overflow", "Connections open beyond pool_size (negative while the pool is not yet full)",
+    _pool_gauge("overflow"), ("engine",)
+)
+metrics_registry.gauge("db_pool_size", "Configured pool size", _pool_gauge("size"), ("engine",))
+
+
+def instrument_pool(engine, name: str = "primary"):
+    """Count checkouts of `engine`'s pool and report its gauges, labelled engine=`name`"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts_total.inc(name)
+
+    # Picked up by the checkout wait timer of database.connection's pool classes
+    engine.pool.metrics_engine = name
+    _pooled_engines[name] = engine
@@ -0,0 +1,155 @@
+"""
+Live Process Profiler
+Wall-clock stack sampling into collapsed stacks, and tracemalloc snapshots of the top allocators
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List
+
+# Leaf frames that mean the thread is parked, not working
+IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("connection.py", "poll"),
+}
+
+
+class ProfilerBusy(Exception):
+    """A profile is already running in this process"""
+
+
+def _short_path(filename: str) -> str:
+    for marker in ("site-packages" + os.sep, "backend" + os.sep):
+        index = filename.rfind(marker)
+        if index != -1:
+            return filename[index + len(marker):]
+    return os.path.basename(filename)
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack with sys._current_frames() from a
+    helper thread. Cost is one stack walk per thread per interval and
+    nothing at all between profiles, so it is safe on a live worker. Only
+    one profile (CPU or memory) runs at a time.
+    """
+
+    MAX_SECONDS = 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+
+    def _frame_label(self, frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+    def _is_idle(self, frame) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+    def sample(self, seconds: float, interval: float = 0.01, include_idle: bool = False) -> Dict:
+        """Blocking: sample for `seconds`, return collapsed stacks (root first) with counts"""
+        seconds = min(max(seconds, 0.1), self.MAX_SECONDS)
+        interval = max(interval, 0.001)
+        self._acquire()
+        try:
+            own_id = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks: Counter = Counter()
+            samples = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+            while time.perf_counter() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id or (not include_idle and self._is_idle(frame)):
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(self._frame_label(frame))
+                        frame = frame.f_back
+                    if thread_id not in names:
+                        names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                    stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(interval)
+            return {
+                "duration_seconds": round(time.perf_counter() - started, 3),
+                "interval_seconds": interval,
+                "samples": samples,
+                "stacks": stacks,
+            }
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def collapsed(profile: Dict) -> str:
+        """Brendan Gregg collapsed format (flamegraph.pl, speedscope, inferno)"""
+        return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].most_common())
+
+    @staticmethod
+    def top_functions(profile: Dict, limit: int = 25) -> List[Dict]:
+        """Self (leaf) and total (anywhere on stack) sample counts per function"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in profile["stacks"].items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                total_counts[label] += count
+        return [
+            {"function": label, "self": self_counts[label], "total": total}
+            for label, total in total_counts.most_common(limit)
+        ]
+
+    def memory_snapshot(self, seconds: float = 0, limit: int = 25, group_by: str = "lineno", frames: int = 1) -> Dict:
+        """
+        Blocking: top allocators by live size. If tracemalloc isn't already
+        tracing it is started for `seconds` (so only allocations made in that
+        window are seen) and stopped again afterwards.
+        """
+        self._acquire()
+        started_here = False
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(max(frames, 1))
+                started_here = True
+            if seconds:
+                time.sleep(min(seconds, self.MAX_SECONDS))
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+            stats = snapshot.statistics(group_by)
+            return {
+                "traced_bytes": current,
+                "peak_bytes": peak,
+                "window_seconds": seconds if started_here else None,
+                "group_by": group_by,
+                "top": [{
+                    "location": [f"{_short_path(frame.filename)}:{frame.lineno}" for frame in stat.traceback],
+                    "size_bytes": stat.size,
+                    "count": stat.count,
+                } for stat in stats[:limit]],
+            }
+        finally:
+            if started_here:
+                tracemalloc.stop()
+            self._lock.release()
+
+
+# Singleton instance
+profiler = SamplingProfiler()
@@ -0,0 +1,183 @@
+"""
+Permission-aware Response Cache
+Shares computed GET responses between callers with the same permission set
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from utils.http_cache import conditional_get_stats, etag_matches
+from utils.timing import annotate
+
+
+class _Entry:
+    __slots__ = ("status", "headers", "body", "tags", "expires_at", "size")
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes,
+                 tags: FrozenSet[str], expires_at: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.tags = tags
+        self.expires_at = expires_at
+        self.size = len(body) + sum(len(k) + len(v) for k, v in headers)
+
+
+class ResponseCache:
+    """
+    LRU cache of response bodies bounded by total bytes.
+
+    Keys are (path, query, permission fingerprint), never a user ID, so every
+    caller with the same permission set is served the same entry. Entries
+    carry the data sources they were built from as tags; invalidating a tag
+    drops every entry built from that source.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: int = 300):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 4
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Paths that have produced a cacheable response; other requests skip the lookup
+        self.cacheable_paths = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Tuple) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple, status: int, headers: List[Tuple[bytes, bytes]], body: bytes,
+            tags: Iterable[str]):
+        entry = _Entry(status, headers, body, frozenset(tags), time.monotonic() + self.ttl_seconds)
+        if entry.size > self.max_entry_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def invalidate(self, tag: str) -> int:
+        """Drop every entry built from the given data source"""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if tag in entry.tags]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        """Drop everything, e.g. after a permission change"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+class ResponseCacheMiddleware:
+    """
+    Pure ASGI middleware serving GET responses from a ResponseCache.
+
+    Routes opt in by setting `request.state.cache_tags` (the conditional_get
+    dependency does this); only 200 responses from opted-in routes are stored.
+    Cache hits still honour If-None-Match against the stored ETag.
+    """
+
+    def __init__(self, app, cache: ResponseCache, fingerprint: Callable[[Optional[str]], str]):
+        self.app = app
+        self.cache = cache
+        self.fingerprint = fingerprint
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        authorization = headers.get(b"authorization")
+        key = (
+            scope["path"],
+            scope.get("query_string", b""),
+            self.fingerprint(authorization.decode("latin-1") if authorization else None)
+        )
+
+        if scope["path"] in self.cache.cacheable_paths:
+            entry = self.cache.get(key)
+            if entry is not None:
+                annotate("response_cache", "hit")
+                await self._send_cached(entry, headers.get(b"if-none-match"), scope["path"], send)
+                return
+
+        status = None
+        response_headers = []
+        tags = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal status, response_headers, tags
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+                # Routes tag themselves before responding; untagged (e.g. streaming) bodies are never buffered
+                tags = scope.get("state", {}).get("cache_tags") if status == 200 else None
+                if tags:
+                    annotate("response_cache", "miss")
+            elif message["type"] == "http.response.body" and tags:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.cache.cacheable_paths.add(scope["path"])
+                    self.cache.put(key, status, response_headers, b"".join(chunks), tags)
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+    async def _send_cached(self, entry: _Entry, if_none_match: Optional[bytes], path: str, send):
+        etag = next((v.decode("latin-1") for k, v in entry.headers if k.lower() == b"etag"), None)
+        if etag and etag_matches(if_none_match.decode("latin-1") if if_none_match else None, etag):
+            conditional_get_stats.record(path, hit=True)
+            headers = [(k, v) for k, v in entry.headers if k.lower() in (b"etag", b"cache-control")]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if etag:
+            conditional_get_stats.record(path, hit=False)
+        await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers})
+        await send({"type": "http.response.body", "body": entry.body})
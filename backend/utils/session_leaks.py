@@ -0,0 +1,112 @@
+"""
+Session Leak Detection
+Reports SQLAlchemy sessions that still hold a connection after the request that opened them has responded
+"""
+import logging
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from datetime import datetime
+from typing import Dict, List
+
+from utils.timing import current
+from utils.metrics_registry import db_session_leaks_total
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLeakDetector:
+    """
+    Tracks every session of a tracked sessionmaker from the moment it checks
+    out a connection (after_begin) until its outermost transaction ends
+    (commit, rollback or close). When a request responds, any session it
+    opened that is still in a transaction is reported as a leak: the
+    connection stays checked out after the handler is done with it.
+    Sessions opened outside a request (warm-up, background loops) are
+    listed in snapshot() but never reported.
+    """
+
+    def __init__(self, capacity: int = 100, capture_stack: bool = False):
+        self.capture_stack = capture_stack
+        self._lock = threading.Lock()
+        # id(session) -> {"session": weakref, "timing", "opened", "stack", "reported"}
+        self._open: Dict[int, Dict] = {}
+        self._leaks = deque(maxlen=capacity)
+        self.total_leaks = 0
+
+    def track(self, session_factory):
+        """Listen for transaction begin/end on every session `session_factory` creates"""
+        from sqlalchemy import event
+
+        event.listen(session_factory, "after_begin", self._begin)
+        event.listen(session_factory, "after_transaction_end", self._end)
+
+    def _begin(self, session, transaction, connection):
+        key = id(session)
+        if key in self._open:
+            # after_begin fires once per bind; the first one starts the clock
+            return
+        entry = {
+            "session": weakref.ref(session, lambda _, key=key: self._forget(key)),
+            "timing": current(),
+            "opened": time.monotonic(),
+            "stack": self._opened_at() if self.capture_stack else None,
+            "reported": False,
+        }
+        with self._lock:
+            self._open[key] = entry
+
+    @staticmethod
+    def _opened_at(depth: int = 8) -> List[str]:
+        """Innermost application frames of the code that started the transaction"""
+        frames = [
+            frame for frame in traceback.extract_stack()
+            if "sqlalchemy" not in frame.filename and frame.filename != __file__
+        ]
+        return traceback.format_list(frames[-depth:])
+
+    def _end(self, session, transaction):
+        if transaction.parent is None:
+            self._forget(id(session))
+
+    def _forget(self, key: int):
+        with self._lock:
+            self._open.pop(key, None)
+
+    def consider(self, scope, method: str, route: str, status: int, total_ms: float, timing):
+        """TimingMiddleware hook: report sessions this request left open"""
+        with self._lock:
+            leaked = [entry for entry in self._open.values() if entry["timing"] is timing and not entry["reported"]]
+            for entry in leaked:
+                entry["reported"] = True
+        for entry in leaked:
+            leak = {
+                "timestamp": datetime.now().isoformat(),
+                "method": method,
+                "route": route,
+                "status": status,
+                "open_ms": round((time.monotonic() - entry["opened"]) * 1000, 1),
+                "opened_at": "".join(entry["stack"]) if entry["stack"] else None,
+            }
+            with self._lock:
+                self._leaks.append(leak)
+                self.total_leaks += 1
+            db_session_leaks_total.inc(method, route)
+            logger.warning("Session left open by %s %s after %.0fms", method, route, leak["open_ms"], extra={"session_leak": leak})
+
+    def open_count(self) -> int:
+        return len(self._open)
+
+    def snapshot(self, limit: int = 50) -> Dict:
+        """Recent leaks (newest first) and the age of every session still holding a connection"""
+        now = time.monotonic()
+        with self._lock:
+            leaks: List[Dict] = list(self._leaks)[::-1][:limit]
+            open_sessions = sorted(
+                ({"open_ms": round((now - entry["opened"]) * 1000, 1), "in_request": entry["timing"] is not None,
+                  "reported": entry["reported"]} for entry in self._open.values()),
+                key=lambda session: session["open_ms"], reverse=True
+            )
+        return {"total_leaks": self.total_leaks, "leaks": leaks, "open_sessions": open_sessions}
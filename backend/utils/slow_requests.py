@@ -0,0 +1,70 @@
+"""
+Slow Request Log
+Bounded ring buffer of requests over a latency threshold, with the context needed to explain them
+"""
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.sql_stats import top_shapes
+
+logger = logging.getLogger(__name__)
+
+
+class SlowRequestLog:
+    """
+    Keeps the last `capacity` requests whose time to response start reached
+    `threshold_ms`: route, user, stage timings, SQL statement count and
+    time, Sheets reads and cache states. Old entries fall off the end.
+    """
+
+    def __init__(self, threshold_ms: float = 1000, capacity: int = 200):
+        self.threshold_ms = threshold_ms
+        self._entries = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.total_recorded = 0
+
+    def consider(self, scope, method: str, route: str, status: int, total_ms: float, timing):
+        """TimingMiddleware hook: record the request if it was slow"""
+        if total_ms < self.threshold_ms:
+            return
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "method": method,
+            "route": route,
+            "path": scope.get("path"),
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "status": status,
+            "total_ms": round(total_ms, 1),
+            "user_id": timing.notes.get("user_id"),
+            "stages_ms": {stage: round(ms, 1) for stage, ms in timing.stages.items()},
+            "sql": {
+                "statements": timing.counts.get("sql_statements", 0),
+                "ms": round(timing.stages.get("db", 0.0), 1),
+                "top_shapes": top_shapes(timing),
+            },
+            "sheets": {
+                "calls": timing.counts.get("sheets_calls", 0),
+                "ranges": list(timing.notes.get("sheets_ranges", [])),
+                "cache": dict(timing.notes.get("sheets_cache", {})),
+            },
+            "response_cache": timing.notes.get("response_cache"),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.total_recorded += 1
+        logger.warning("Slow request %s %s took %.0fms", method, route, total_ms, extra={"slow_request": entry})
+
+    def snapshot(self, limit: int = 50, route: Optional[str] = None) -> List[Dict]:
+        """Newest first, optionally only one route template"""
+        with self._lock:
+            entries = list(self._entries)
+        if route:
+            entries = [entry for entry in entries if entry["route"] == route]
+        return entries[::-1][:limit]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
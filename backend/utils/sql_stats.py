@@ -0,0 +1,144 @@
+"""
+SQL Statistics
+Per-request statement counts and shapes, N+1 detection and a query-count assertion for tests
+"""
+import functools
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+from utils.timing import current, record, count
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NAMED = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s")
+_SPACE = re.compile(r"\s+")
+
+
+class NPlusOneError(AssertionError):
+    """The same statement shape ran too many times in one request"""
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint_statement(statement: str) -> str:
+    """Statement shape: literals and bind markers become ?, IN lists collapse, whitespace normalized"""
+    shape = _STRING.sub("?", statement)
+    shape = _NAMED.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class NPlusOneDetector:
+    """
+    Flags requests that run one statement shape `threshold` or more times.
+    mode 'warn' logs the request when it responds; 'raise' fails the query
+    that crosses the threshold (for tests); 'off' only counts.
+    """
+
+    def __init__(self, threshold: int = 5, mode: str = "off"):
+        self.threshold = threshold
+        self.mode = mode
+        self._lock = threading.Lock()
+        # route -> shape -> {"max_count", "occurrences", "last_seen"}
+        self.findings: Dict[str, Dict[str, Dict]] = {}
+
+    def check_statement(self, shape: str, seen: int):
+        if self.mode == "raise" and seen == self.threshold:
+            raise NPlusOneError(f"Statement ran {seen} times in one request: {shape}")
+
+    def consider(self, scope, method: str, route: str, status: int, total_ms: float, timing):
+        """TimingMiddleware hook: record repeated shapes for the request"""
+        if self.mode == "off":
+            return
+        shapes = timing.notes.get("sql_shapes")
+        if not shapes:
+            return
+        repeated = {shape: n for shape, n in shapes.items() if n >= self.threshold}
+        if not repeated:
+            return
+        label = f"{method} {route}"
+        with self._lock:
+            route_findings = self.findings.setdefault(label, {})
+            for shape, n in repeated.items():
+                finding = route_findings.setdefault(shape, {"max_count": 0, "occurrences": 0})
+                finding["max_count"] = max(finding["max_count"], n)
+                finding["occurrences"] += 1
+                finding["last_seen"] = datetime.now().isoformat()
+        for shape, n in repeated.items():
+            logger.warning("Possible N+1 on %s: %d x %s", label, n, shape)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            findings = {route: {shape: dict(f) for shape, f in shapes.items()} for route, shapes in self.findings.items()}
+        return {"threshold": self.threshold, "mode": self.mode, "routes": findings}
+
+
+def instrument_engine(engine, detector: Optional[NPlusOneDetector] = None):
+    """Record SQL time under the 'db' stage, count statements and their shapes per request"""
+    from sqlalchemy import event
+
+    # The start time lives on the statement's execution context, which is dropped
+    # with it: a statement that fails never reaches _after and leaves nothing behind
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._timing_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_timing_started", None)
+        if started is not None:
+            record("db", (time.perf_counter() - started) * 1000)
+        count("sql_statements")
+        timing = current()
+        if timing is not None:
+            shapes = timing.notes.setdefault("sql_shapes", {})
+            shape = fingerprint_statement(statement)
+            shapes[shape] = shapes.get(shape, 0) + 1
+            if detector is not None:
+                detector.check_statement(shape, shapes[shape])
+
+
+def top_shapes(timing, limit: int = 5) -> Dict[str, int]:
+    """Most repeated statement shapes of a request"""
+    shapes = Counter(timing.notes.get("sql_shapes", {}))
+    return dict(shapes.most_common(limit))
+
+
+@contextmanager
+def assert_max_queries(engine, maximum: int):
+    """
+    Test helper: fail if the block runs more than `maximum` statements on
+    `engine` (from any thread, so it works around TestClient calls).
+
+        with assert_max_queries(engine, 3):
+            client.get("/api/permissions/me", headers=auth)
+    """
+    from sqlalchemy import event
+
+    lock = threading.Lock()
+    shapes: Counter = Counter()
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        with lock:
+            shapes[fingerprint_statement(statement)] += 1
+
+    event.listen(engine, "after_cursor_execute", _count)
+    try:
+        yield shapes
+    finally:
+        event.remove(engine, "after_cursor_execute", _count)
+
+    total = sum(shapes.values())
+    if total > maximum:
+        detail = "\n".join(f"  {n} x {shape}" for shape, n in shapes.most_common(5))
+        raise AssertionError(f"Expected at most {maximum} queries, ran {total}:\n{detail}")
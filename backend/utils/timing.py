@@ -0,0 +1,242 @@
+"""
+Request Timing
+Per-stage spans for the current request, emitted as Server-Timing and aggregated into per-route histograms
+"""
+import bisect
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Stages the app records; anything else passed to span() is still reported
+STAGES = ("sheets_fetch", "parse", "compute", "db", "llm", "serialize")
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is +Inf)
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class RequestTiming:
+    """Accumulated milliseconds per stage for one request, plus counters and context notes"""
+
+    __slots__ = ("stages", "counts", "notes")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.notes: Dict[str, Any] = {}
+
+    def add(self, stage: str, ms: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def record(stage: str, ms: float):
+    """Add `ms` to a stage of the current request (no-op outside a request)"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(stage, ms)
+
+
+def count(name: str, n: int = 1):
+    """Bump a per-request counter (e.g. SQL statements, Sheets calls)"""
+    timing = _current.get()
+    if timing is not None:
+        timing.counts[name] = timing.counts.get(name, 0) + n
+
+
+def annotate(key: str, value: Any, item: Optional[str] = None):
+    """Attach context to the current request; with `item`, set notes[key][item]"""
+    timing = _current.get()
+    if timing is None:
+        return
+    if item is None:
+        timing.notes[key] = value
+    else:
+        timing.notes.setdefault(key, {})[item] = value
+
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+def detach():
+    """Stop reporting into the request timing this context inherited (for long-lived background tasks)"""
+    _current.set(None)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a block under `stage`. Nested and repeated spans of the same stage
+    add up; spans in tasks started by the request (gather, to_thread) land in
+    the same request because they inherit its context, so overlapping work can
+    sum to more than the wall-clock total.
+    """
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(stage, (time.perf_counter() - started) * 1000)
+
+
+def timed(stage: str):
+    """Decorator form of span() for coroutine functions"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(stage):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    __slots__ = ("counts", "count", "sum_ms")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum_ms / self.count, 2) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in BUCKETS_MS] + ["+Inf"], self.counts)),
+        }
+
+
+class RouteTimings:
+    """Histograms per (method, route template, stage); 'total' is the whole request"""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str, str], Histogram] = {}
+
+    def observe(self, method: str, route: str, stage: str, ms: float):
+        key = (method, route, stage)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(ms)
+
+    def snapshot(self) -> Dict:
+        routes: Dict[str, Dict] = {}
+        for (method, route, stage), histogram in sorted(self.histograms.items()):
+            routes.setdefault(f"{method} {route}", {})[stage] = histogram.summary()
+        return {"buckets_ms": list(BUCKETS_MS), "routes": routes}
+
+    def clear(self):
+        self.histograms.clear()
+
+
+class TimingMiddleware:
+    """
+    Opens a RequestTiming for each HTTP request, adds a Server-Timing header
+    when the response starts and folds the stages into `timings` (and the
+    total into `observer(method, route, status, ms)`, if given), and passes
+    the finished timing to each inspector's `consider()`. Counters go into
+    the header as desc-only entries. Route labels are the matched path templates,
+    so path parameters don't multiply the histograms; unmatched paths share
+    one label.
+    """
+
+    def __init__(self, app, timings: RouteTimings, emit_header: bool = True,
+                 observer: Optional[Callable[[str, str, int, float], None]] = None,
+                 inspectors: Iterable = ()):
+        self.app = app
+        self.timings = timings
+        self.emit_header = emit_header
+        self.observer = observer
+        self.inspectors = list(inspectors)
+        self._route_paths: Dict[object, str] = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in getattr(scope.get("app"), "routes", []):
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            else:
+                path = "unmatched"
+            self._route_paths[endpoint] = path
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        started = time.perf_counter()
+        responded = False
+
+        async def timing_send(message):
+            nonlocal responded
+            if message["type"] == "http.response.start":
+                responded = True
+                total = (time.perf_counter() - started) * 1000
+                method, route = scope["method"], self._route_label(scope)
+                for stage, ms in timing.stages.items():
+                    self.timings.observe(method, route, stage, ms)
+                self.timings.observe(method, route, "total", total)
+                if self.observer is not None:
+                    self.observer(method, route, message["status"], total)
+                for inspector in self.inspectors:
+                    inspector.consider(scope, method, route, message["status"], total, timing)
+                if self.emit_header:
+                    entries = [f"{stage};dur={ms:.1f}" for stage, ms in timing.stages.items()]
+                    entries += [f'{name};desc="{n}"' for name, n in timing.counts.items()]
+                    entries.append(f"total;dur={total:.1f}")
+                    message = {
+                        **message,
+                        "headers": list(message.get("headers", [])) + [(b"server-timing", ", ".join(entries).encode("latin-1"))]
+                    }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timing_send)
+        except Exception:
+            # Unhandled errors become a 500 further out; still count them
+            if not responded and self.observer is not None:
+                self.observer(scope["method"], self._route_label(scope), 500, (time.perf_counter() - started) * 1000)
+            raise
+        finally:
+            _current.reset(token)
+
+
+# Singleton instance
+route_timings = RouteTimings()
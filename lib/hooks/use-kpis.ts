@@ -14,18 +14,26 @@ import type {
     KPITimePeriod,
 } from '@/types/kpi';
 import { fetchKPIs, fetchKPIAlerts, setKPIGoal } from '@/lib/services/kpi-api';
+import { useMetricStream } from './use-metric-stream';
 
 const FIVE_MINUTES = 5 * 60 * 1000;
 
 /**
  * Hook to fetch KPIs for a specific time period
+ * Refetched when the live metric stream reports a data change instead of polling
  */
 export function useKPIs(period: KPITimePeriod): UseQueryResult<KPIResponse, Error> {
+    const queryClient = useQueryClient();
+
+    useMetricStream(() => {
+        queryClient.invalidateQueries({ queryKey: ['kpis', period] });
+    });
+
     return useQuery({
         queryKey: ['kpis', period],
         queryFn: () => fetchKPIs(period),
-        staleTime: FIVE_MINUTES,
-        refetchOnWindowFocus: true,
+        staleTime: Infinity,
+        refetchOnWindowFocus: false,
         retry: 3,
     });
 }
@@ -0,0 +1,111 @@
+/**
+ * Live Metric Stream
+ * One shared Server-Sent Events connection that pushes metric changes into the React Query cache
+ */
+
+'use client';
+
+import { useEffect, useRef } from 'react';
+import { useQueryClient, QueryClient } from '@tanstack/react-query';
+import type { MetricType } from '@/types/metrics';
+
+const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+
+type MetricDelta = Partial<Record<MetricType, Record<string, any>>>;
+type DeltaListener = (delta: MetricDelta) => void;
+
+interface StreamListener {
+    onDelta: DeltaListener;
+    // The stream was lost, so changes may have been missed
+    onReset: () => void;
+}
+
+const INITIAL_RETRY_MS = 1000;
+const MAX_RETRY_MS = 60 * 1000;
+
+let source: EventSource | null = null;
+let retryTimer: ReturnType<typeof setTimeout> | null = null;
+let retryDelay = INITIAL_RETRY_MS;
+const listeners = new Set<StreamListener>();
+
+function getAuthToken(): string | null {
+    if (typeof window === 'undefined') return null;
+    return localStorage.getItem('auth_access_token');
+}
+
+function connect() {
+    const token = getAuthToken();
+    if (!token || source || retryTimer) return;
+
+    // EventSource can't set headers, so the token travels in the query string
+    source = new EventSource(`${API_BASE_URL}/api/metrics/stream?token=${encodeURIComponent(token)}`);
+    source.onopen = () => {
+        retryDelay = INITIAL_RETRY_MS;
+    };
+    source.addEventListener('metrics', (event) => {
+        const delta: MetricDelta = JSON.parse((event as MessageEvent).data);
+        listeners.forEach(listener => listener.onDelta(delta));
+    });
+    source.onerror = () => {
+        // EventSource retries dropped connections itself, but gives up for good
+        // on an HTTP error (e.g. a 401 once the token expired)
+        if (!source || source.readyState !== EventSource.CLOSED) return;
+        source = null;
+        listeners.forEach(listener => listener.onReset());
+        retryTimer = setTimeout(() => {
+            retryTimer = null;
+            if (listeners.size > 0) connect();
+        }, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, MAX_RETRY_MS);
+    };
+}
+
+function disconnect() {
+    source?.close();
+    source = null;
+    if (retryTimer) clearTimeout(retryTimer);
+    retryTimer = null;
+    retryDelay = INITIAL_RETRY_MS;
+}
+
+function applyDelta(queryClient: QueryClient, delta: MetricDelta) {
+    (Object.keys(delta) as MetricType[]).forEach(type => {
+        queryClient.setQueryData(['metric', type], (old: Record<string, any> | undefined) =>
+            old ? { ...old, ...delta[type] } : old
+        );
+    });
+}
+
+/**
+ * Subscribe to live metric changes for as long as the component is mounted.
+ * All mounted subscribers share one connection; each delta is written into
+ * the ['metric', type] queries and passed to the optional listener. If the
+ * stream closes, the metric queries are refetched, the listener is called
+ * with an empty delta, and the connection is retried with backoff.
+ */
+export function useMetricStream(onDelta?: DeltaListener): void {
+    const queryClient = useQueryClient();
+    const onDeltaRef = useRef(onDelta);
+    onDeltaRef.current = onDelta;
+
+    useEffect(() => {
+        const listener: StreamListener = {
+            onDelta: (delta) => {
+                applyDelta(queryClient, delta);
+                onDeltaRef.current?.(delta);
+            },
+            onReset: () => {
+                queryClient.invalidateQueries({ queryKey: ['metric'] });
+                onDeltaRef.current?.({});
+            },
+        };
+
+        listeners.add(listener);
+        connect();
+
+        return () => {
+            listeners.delete(listener);
+            if (listeners.size === 0) disconnect();
+        };
+    }, [queryClient]);
+}
@@ -8,18 +8,22 @@
 import { useQuery, UseQueryResult } from '@tanstack/react-query';
 import type { MetricType, MetricResponse, MetricHistoryPoint, SparklineDataPoint } from '@/types/metrics';
 import { fetchMetric, fetchMetricHistory, fetchAllMetrics } from '@/lib/services/metrics-api';
+import { useMetricStream } from './use-metric-stream';
 
 const FIVE_MINUTES = 5 * 60 * 1000;
 
 /**
  * Hook to fetch a single metric
+ * Fetched once, then kept current by the live metric stream instead of polling
  */
 export function useMetric(type: MetricType): UseQueryResult<MetricResponse, Error> {
+    useMetricStream();
+
     return useQuery({
         queryKey: ['metric', type],
         queryFn: () => fetchMetric(type),
-        staleTime: FIVE_MINUTES,
-        refetchOnWindowFocus: true,
+        staleTime: Infinity,
+        refetchOnWindowFocus: false,
         retry: 3,
     });
 }